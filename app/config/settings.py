@@ -61,13 +61,411 @@ class Settings:
     def dictionary_api_max_retries(self) -> int:
         return self.config.getint('dictionary_api', 'max_retries', fallback=3)
     
+    @property
+    def dictionary_api_deadline(self) -> float:
+        """Seconds a lookup may spend on the API, retries included."""
+        return self.config.getfloat('dictionary_api', 'deadline', fallback=10)
+    
+    @property
+    def dictionary_api_hedge_percentile(self) -> float:
+        """Latency quantile after which a second request is sent (0 disables hedging)."""
+        return self.config.getfloat('dictionary_api', 'hedge_percentile', fallback=0.95)
+    
+    @property
+    def dictionary_api_connect_timeout(self) -> float:
+        return self.config.getfloat('dictionary_api', 'connect_timeout', fallback=3.0)
+
+    @property
+    def dictionary_api_pool_limit(self) -> int:
+        return self.config.getint('dictionary_api', 'pool_limit', fallback=100)
+
+    @property
+    def dictionary_api_pool_limit_per_host(self) -> int:
+        return self.config.getint('dictionary_api', 'pool_limit_per_host', fallback=20)
+
+    @property
+    def dictionary_api_keepalive_timeout(self) -> float:
+        return self.config.getfloat('dictionary_api', 'keepalive_timeout', fallback=30.0)
+
+    @property
+    def dictionary_api_dns_cache_ttl(self) -> int:
+        return self.config.getint('dictionary_api', 'dns_cache_ttl', fallback=300)
+    
+    @property
+    def dictionary_api_batch_concurrency(self) -> int:
+        """Maximum number of concurrent lookups of one batch request."""
+        return self.config.getint('dictionary_api', 'batch_concurrency', fallback=16)
+
+    @property
+    def dictionary_api_batch_max_words(self) -> int:
+        return self.config.getint('dictionary_api', 'batch_max_words', fallback=500)
+
+    @property
+    def dictionary_backend(self) -> str:
+        """Either 'remote' (dictionary API only) or 'local' (local index first)."""
+        return self.config.get('dictionary_api', 'backend', fallback='remote').strip().lower()
+
+    @property
+    def local_dictionary_path(self) -> str:
+        return self.config.get('local_dictionary', 'path', fallback='data/dictionary.sqlite3')
+
+    @property
+    def local_dictionary_remote_fallback(self) -> bool:
+        return self.config.getboolean('local_dictionary', 'remote_fallback', fallback=True)
+
+    @property
+    def lookup_cache_enabled(self) -> bool:
+        return self.config.getboolean('lookup_cache', 'enabled', fallback=True)
+
+    @property
+    def lookup_cache_memory_size(self) -> int:
+        return self.config.getint('lookup_cache', 'memory_size', fallback=5000)
+
+    @property
+    def lookup_cache_ttl(self) -> int:
+        return self.config.getint('lookup_cache', 'ttl', fallback=86400)
+
+    @property
+    def lookup_cache_negative_ttl(self) -> int:
+        return self.config.getint('lookup_cache', 'negative_ttl', fallback=3600)
+
+    @property
+    def lookup_cache_disk_path(self) -> str:
+        """Path of the persistent cache tier; empty disables it."""
+        return self.config.get('lookup_cache', 'disk_path', fallback='cache/lookup.sqlite3')
+
+    @property
+    def lookup_cache_disk_max_entries(self) -> int:
+        return self.config.getint('lookup_cache', 'disk_max_entries', fallback=200000)
+    
+    @property
+    def lookup_cache_stale_ttl(self) -> int:
+        """Seconds expired entries are kept on disk to be served while the API is failing."""
+        return self.config.getint('lookup_cache', 'stale_ttl', fallback=604800)
+    
+    @property
+    def llm_cache_enabled(self) -> bool:
+        return self.config.getboolean('llm_cache', 'enabled', fallback=True)
+
+    @property
+    def llm_cache_memory_size(self) -> int:
+        return self.config.getint('llm_cache', 'memory_size', fallback=1000)
+
+    @property
+    def llm_cache_ttl(self) -> int:
+        return self.config.getint('llm_cache', 'ttl', fallback=604800)
+
+    @property
+    def llm_cache_disk_path(self) -> str:
+        """Path of the persistent cache tier; empty disables it."""
+        return self.config.get('llm_cache', 'disk_path', fallback='cache/llm.sqlite3')
+
+    @property
+    def llm_cache_disk_max_entries(self) -> int:
+        return self.config.getint('llm_cache', 'disk_max_entries', fallback=50000)
+
+    @property
+    def phonetic_concurrency(self) -> int:
+        return self.config.getint('vocabulary', 'phonetic_concurrency', fallback=8)
+
+    @property
+    def phonetic_timeout(self) -> float:
+        return self.config.getfloat('vocabulary', 'phonetic_timeout', fallback=3.0)
+    
+    @property
+    def vocab_chunk_size(self) -> int:
+        """Texts longer than this many characters are extracted in chunks."""
+        return self.config.getint('vocabulary', 'chunk_size', fallback=4000)
+
+    @property
+    def vocab_chunk_parallelism(self) -> int:
+        return self.config.getint('vocabulary', 'chunk_parallelism', fallback=4)
+
+    @property
+    def vocab_max_words(self) -> int:
+        """Number of words kept after merging the chunk results."""
+        return self.config.getint('vocabulary', 'max_words', fallback=10)
+    
+    @property
+    def vocab_url_cache_ttl(self) -> int:
+        """How long vocabulary extracted from a URL is served without fetching the page again."""
+        return self.config.getint('vocabulary', 'url_cache_ttl', fallback=3600)
+
+    @property
+    def vocab_extraction_mode(self) -> str:
+        """Either 'llm' (Gemini) or 'local' (frequency ranking and dictionary definitions)."""
+        return self.config.get('vocabulary', 'extraction_mode', fallback='llm').strip().lower()
+
+    @property
+    def vocab_frequency_list_path(self) -> str:
+        return self.config.get('vocabulary', 'frequency_list', fallback='data/word_frequency.txt')
+
+    @property
+    def vocab_prefilter(self) -> bool:
+        """Send only uncommon candidate words to Gemini instead of the full text."""
+        return self.config.getboolean('vocabulary', 'prefilter', fallback=True)
+
+    @property
+    def vocab_common_rank_cutoff(self) -> int:
+        """Words ranked at or above this frequency rank are considered common."""
+        return self.config.getint('vocabulary', 'common_rank_cutoff', fallback=4000)
+
+    @property
+    def vocab_max_candidates(self) -> int:
+        return self.config.getint('vocabulary', 'max_candidates', fallback=60)
+    
+    @property
+    def phonetics_table_path(self) -> str:
+        """Precomputed word -> IPA table, built on first start if missing."""
+        return self.config.get('phonetics', 'table_path', fallback='data/ipa_table.bin')
+
+    @property
+    def phonetics_memo_size(self) -> int:
+        return self.config.getint('phonetics', 'memo_size', fallback=50000)
+
+    @property
+    def phonetics_workers(self) -> int:
+        """Threads used for conversions the precomputed table cannot answer."""
+        return self.config.getint('phonetics', 'workers', fallback=2)
+    
+    @property
+    def web_fetcher_backend(self) -> str:
+        """Either 'local' (download and parse pages) or 'fetchfox'."""
+        return self.config.get('web_fetcher', 'backend', fallback='local').strip().lower()
+
+    @property
+    def web_fetcher_fetchfox_fallback(self) -> bool:
+        """Use FetchFox when local extraction fails."""
+        return self.config.getboolean('web_fetcher', 'fetchfox_fallback', fallback=True)
+
+    @property
+    def web_fetcher_max_bytes(self) -> int:
+        """Pages are truncated to this many bytes."""
+        return self.config.getint('web_fetcher', 'max_bytes', fallback=5242880)
+
+    @property
+    def web_fetcher_min_content_chars(self) -> int:
+        """Local extractions with less content than this count as failed."""
+        return self.config.getint('web_fetcher', 'min_content_chars', fallback=200)
+
+    @property
+    def web_fetcher_download_timeout(self) -> float:
+        return self.config.getfloat('web_fetcher', 'download_timeout', fallback=20)
+
+    @property
+    def web_fetcher_user_agent(self) -> str:
+        return self.config.get('web_fetcher', 'user_agent', fallback='Mozilla/5.0 (compatible; LexicaBot/1.0)')
+
+    @property
+    def web_fetcher_concurrency(self) -> int:
+        """Maximum number of FetchFox extractions running at the same time."""
+        return self.config.getint('web_fetcher', 'concurrency', fallback=4)
+
+    @property
+    def web_fetcher_timeout(self) -> float:
+        return self.config.getfloat('web_fetcher', 'timeout', fallback=120)
+
+    @property
+    def web_fetcher_allow_private_addresses(self) -> bool:
+        """Let the local backend fetch loopback and internal addresses (local testing only)."""
+        return self.config.getboolean('web_fetcher', 'allow_private_addresses', fallback=False)
+
+    @property
+    def web_fetcher_max_redirects(self) -> int:
+        return self.config.getint('web_fetcher', 'max_redirects', fallback=5)
+
+    @property
+    def fetchfox_max_retries(self) -> int:
+        """Retries of a FetchFox extraction after a server error (timeouts are not retried)."""
+        return self.config.getint('web_fetcher', 'fetchfox_max_retries', fallback=1)
+
+    @property
+    def fetchfox_deadline(self) -> float:
+        """Seconds a FetchFox extraction may take, retries included."""
+        return self.config.getfloat('web_fetcher', 'fetchfox_deadline', fallback=180)
+
+    @property
+    def web_fetcher_batch_max_urls(self) -> int:
+        return self.config.getint('web_fetcher', 'batch_max_urls', fallback=100)
+
+    @property
+    def web_fetcher_batch_concurrency(self) -> int:
+        """Maximum number of concurrent fetches of one batch request."""
+        return self.config.getint('web_fetcher', 'batch_concurrency', fallback=8)
+
+    @property
+    def web_fetcher_batch_per_host(self) -> int:
+        """Maximum number of concurrent fetches from one host in a batch request."""
+        return self.config.getint('web_fetcher', 'batch_per_host', fallback=2)
+
+    @property
+    def web_fetcher_batch_deadline(self) -> float:
+        """Default and maximum time budget of a batch request, in seconds."""
+        return self.config.getfloat('web_fetcher', 'batch_deadline', fallback=120)
+
+    @property
+    def web_cache_enabled(self) -> bool:
+        return self.config.getboolean('web_fetcher', 'cache_enabled', fallback=True)
+
+    @property
+    def web_cache_memory_size(self) -> int:
+        return self.config.getint('web_fetcher', 'cache_memory_size', fallback=500)
+
+    @property
+    def web_cache_ttl(self) -> int:
+        """How long fetched pages are kept at all."""
+        return self.config.getint('web_fetcher', 'cache_ttl', fallback=604800)
+
+    @property
+    def web_cache_fresh_ttl(self) -> int:
+        """How long fetched pages are served without revalidation."""
+        return self.config.getint('web_fetcher', 'cache_fresh_ttl', fallback=3600)
+
+    @property
+    def web_cache_revalidate_timeout(self) -> float:
+        return self.config.getfloat('web_fetcher', 'revalidate_timeout', fallback=5)
+
+    @property
+    def web_cache_disk_path(self) -> str:
+        """Path of the persistent cache tier; empty disables it."""
+        return self.config.get('web_fetcher', 'cache_disk_path', fallback='cache/web.sqlite3')
+
+    @property
+    def web_cache_disk_max_entries(self) -> int:
+        return self.config.getint('web_fetcher', 'cache_disk_max_entries', fallback=20000)
+    
+    @property
+    def quiz_engine(self) -> str:
+        """Either 'llm' (Gemini, with the local engine as fallback) or 'local'."""
+        return self.config.get('quiz', 'engine', fallback='llm').strip().lower()
+
+    @property
+    def quiz_llm_timeout(self) -> float:
+        """Seconds to wait for Gemini before answering with a local quiz."""
+        return self.config.getfloat('quiz', 'llm_timeout', fallback=8)
+
+    @property
+    def quiz_distractor_list_path(self) -> str:
+        return self.config.get('quiz', 'distractor_list', fallback='data/word_pos.tsv')
+
+    @property
+    def quiz_band_size(self) -> int:
+        """Number of words per frequency band of the distractor index."""
+        return self.config.getint('quiz', 'band_size', fallback=1000)
+
+    @property
+    def quiz_chunk_size(self) -> int:
+        """Number of words per Gemini quiz request; larger word lists are split and generated in parallel."""
+        return self.config.getint('quiz', 'chunk_size', fallback=5)
+
+    @property
+    def quiz_chunk_concurrency(self) -> int:
+        return self.config.getint('quiz', 'chunk_concurrency', fallback=4)
+
+    @property
+    def quiz_chunk_retries(self) -> int:
+        """Extra Gemini attempts for the words of a chunk that got no valid question."""
+        return self.config.getint('quiz', 'chunk_retries', fallback=1)
+
+    @property
+    def question_bank_enabled(self) -> bool:
+        return self.config.getboolean('question_bank', 'enabled', fallback=True)
+
+    @property
+    def question_bank_path(self) -> str:
+        return self.config.get('question_bank', 'path', fallback='cache/questions.sqlite3')
+
+    @property
+    def question_bank_variants(self) -> int:
+        """Questions kept per word sense; words with fewer are topped up in the background."""
+        return self.config.getint('question_bank', 'variants', fallback=3)
+
+    @property
+    def question_bank_min_variants(self) -> int:
+        """Stored questions a word needs before quizzes are served from the bank instead of Gemini."""
+        return self.config.getint('question_bank', 'min_variants', fallback=2)
+
+    @property
+    def question_bank_topup_concurrency(self) -> int:
+        """Background top-ups running at the same time, so they do not starve user requests."""
+        return self.config.getint('question_bank', 'topup_concurrency', fallback=1)
+
+    @property
+    def question_bank_topup_interval(self) -> int:
+        """Minimum seconds between two background top-ups of the same word."""
+        return self.config.getint('question_bank', 'topup_interval', fallback=3600)
+    
+    @property
+    def resilience_backoff_base(self) -> float:
+        """Upper bound of the first retry delay; it doubles with every retry."""
+        return self.config.getfloat('resilience', 'backoff_base', fallback=0.1)
+    
+    @property
+    def resilience_backoff_max(self) -> float:
+        """Upper bound of any retry delay."""
+        return self.config.getfloat('resilience', 'backoff_max', fallback=2)
+    
+    @property
+    def resilience_breaker_failures(self) -> int:
+        """Consecutive failures that open an upstream's circuit (0 disables the breakers)."""
+        return self.config.getint('resilience', 'breaker_failures', fallback=5)
+    
+    @property
+    def resilience_breaker_reset(self) -> float:
+        """Seconds an open circuit fails fast before a trial call is let through."""
+        return self.config.getfloat('resilience', 'breaker_reset', fallback=30)
+    
+    @property
+    def resilience_hedge_budget(self) -> float:
+        """Maximum share of an upstream's calls that may be hedged."""
+        return self.config.getfloat('resilience', 'hedge_budget', fallback=0.1)
+    
+    @property
+    def resilience_hedge_min_samples(self) -> int:
+        """Latencies recorded before hedging starts."""
+        return self.config.getint('resilience', 'hedge_min_samples', fallback=20)
+    
+    @property
+    def metrics_enabled(self) -> bool:
+        """Time every HTTP request and serve /metrics."""
+        return self.config.getboolean('metrics', 'enabled', fallback=True)
+    
+    @property
+    def metrics_loop_lag_interval(self) -> float:
+        """Seconds between two event loop lag probes."""
+        return self.config.getfloat('metrics', 'loop_lag_interval', fallback=0.1)
+    
+    @property
+    def profiling_enabled(self) -> bool:
+        """Allow profiling single requests with an X-Profile header or ?profile=1."""
+        return self.config.getboolean('profiling', 'enabled', fallback=False)
+    
+    @property
+    def profiling_token(self) -> str:
+        """If set, only requests passing this value as the flag are profiled."""
+        return self.config.get('profiling', 'token', fallback='')
+    
+    @property
+    def profiling_sample_interval(self) -> float:
+        return self.config.getfloat('profiling', 'sample_interval', fallback=0.005)
+    
+    @property
+    def profiling_output_dir(self) -> str:
+        return self.config.get('profiling', 'output_dir', fallback='profiles')
+    
+    @property
+    def profiling_stall_threshold(self) -> float:
+        """Log the loop thread's stack when the event loop is blocked this long (seconds); 0 disables."""
+        return self.config.getfloat('profiling', 'stall_threshold', fallback=0.25)
+    
     @property
     def log_level(self) -> str:
         return self.config.get('logging', 'level', fallback='INFO')
     
     @property
     def log_format(self) -> str:
-        return self.config.get('logging', 'format', 
+        # raw: the logging placeholders are not configparser interpolations
+        return self.config.get('logging', 'format', raw=True,
                              fallback='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     
     @property
@@ -86,11 +484,86 @@ class Settings:
     def rate_limit_period(self) -> int:
         return self.config.getint('security', 'rate_limit_period', fallback=60)
 
+    @property
+    def rate_limit_enabled(self) -> bool:
+        return self.config.getboolean('security', 'rate_limit_enabled', fallback=True)
+
+    @property
+    def llm_rate_limit(self) -> int:
+        """Requests per rate_limit_period to the endpoints that call Gemini."""
+        return self.config.getint('security', 'llm_rate_limit', fallback=10)
+
+    @property
+    def llm_routes(self) -> List[str]:
+        """Path prefixes of the endpoints limited by llm_rate_limit."""
+        prefixes = self.config.get('security', 'llm_routes', fallback='/vocab/,/practice/')
+        return [prefix.strip() for prefix in prefixes.split(',') if prefix.strip()]
+
+    @property
+    def rate_limit_exempt(self) -> List[str]:
+        paths = self.config.get('security', 'rate_limit_exempt', fallback='/,/metrics')
+        return [path.strip() for path in paths.split(',') if path.strip()]
+
+    @property
+    def rate_limit_path(self) -> str:
+        """File holding the buckets, shared by all worker processes."""
+        return self.config.get('security', 'rate_limit_path', fallback='cache/rate_limit.bin')
+
+    @property
+    def rate_limit_slots(self) -> int:
+        """Number of client buckets kept; the least recently used are recycled."""
+        return self.config.getint('security', 'rate_limit_slots', fallback=65536)
+
+    @property
+    def trust_forwarded_for(self) -> bool:
+        """Identify clients by X-Forwarded-For (only behind a proxy that sets it)."""
+        return self.config.getboolean('security', 'trust_forwarded_for', fallback=False)
+
+    @property
+    def trusted_proxy_hops(self) -> int:
+        """Proxies in front of the app that append to X-Forwarded-For; the client is the entry this far from the right."""
+        return self.config.getint('security', 'trusted_proxy_hops', fallback=1)
+
     @property
     def gemini_model_name(self) -> str:
         """Get the Gemini model name from the config."""
         return self.config.get('ai', 'gemini_model_name', fallback='gemini-2.0-flash')
 
+    @property
+    def gemini_base_url(self) -> str:
+        """Gemini API endpoint; empty for the default (set to point at a stand-in server)."""
+        return self.config.get('ai', 'base_url', fallback='')
+
+    @property
+    def gemini_requests_per_minute(self) -> float:
+        """Request quota of a single API key."""
+        return self.config.getfloat('ai', 'requests_per_minute', fallback=15)
+
+    @property
+    def gemini_eject_seconds(self) -> float:
+        """How long a key is taken out of rotation after a quota or server error."""
+        return self.config.getfloat('ai', 'eject_seconds', fallback=60)
+
+    @property
+    def gemini_acquire_timeout(self) -> float:
+        """Maximum time a request waits for a key with free quota."""
+        return self.config.getfloat('ai', 'acquire_timeout', fallback=10)
+
+    @property
+    def gemini_max_retries(self) -> int:
+        """Retries of a round in which every key failed; the keys are ejected meanwhile, so keep eject_seconds short."""
+        return self.config.getint('ai', 'max_retries', fallback=0)
+
+    @property
+    def gemini_deadline(self) -> float:
+        """Seconds a generation may take, key failover and retries included."""
+        return self.config.getfloat('ai', 'deadline', fallback=30)
+
+    @property
+    def gemini_hedge_percentile(self) -> float:
+        """Latency quantile after which a second generation is sent (0 disables hedging; hedges spend quota)."""
+        return self.config.getfloat('ai', 'hedge_percentile', fallback=0)
+
     @property
     def api_keys(self) -> List[str]:
         """Get API keys as a list from the environment variable."""
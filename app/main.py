@@ -1,20 +1,101 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from urllib.parse import urldefrag
+
 from fastapi import FastAPI, HTTPException, Query, Body
 from fastapi.middleware.cors import CORSMiddleware  # Add this import
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from app.models.responses import HealthResponse, DictionaryEntry
 from app.services.dictionary import Dictionary
+from app.services.gemini_pool import GeminiClientPool
+from app.services.http_client import HttpClient
+from app.services.phonetics import PhoneticsService
 from app.services.vocabulary_manager import VocabularyManager
 from app.services.practice_games import PracticeGames
 from app.services.web_fetcher import WebFetcher
+from app.utils.metrics import REGISTRY, Counter, Gauge, MetricsMiddleware, monitor_event_loop_lag
+from app.utils.profiling import LoopWatchdog, ProfilingMiddleware
+from app.utils.rate_limiter import RateLimitMiddleware, SharedTokenBuckets
 from app.utils.text_utils import validate_word
 from app.config import settings  # Import settings to get allowed_origins
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+logging.basicConfig(
+    level=settings.log_level,
+    format=settings.log_format,
+    handlers=[logging.StreamHandler()] + ([logging.FileHandler(settings.log_file)] if settings.log_file else [])
+)
+
+# Initialize services
+http_client = HttpClient()
+gemini_pool = GeminiClientPool()
+phonetics = PhoneticsService()
+dictionary = Dictionary(http_client=http_client, phonetics=phonetics)
+# Pages come from client-supplied URLs; they get their own pool, restricted to public addresses
+web_fetcher = WebFetcher()
+vocabulary_manager = VocabularyManager(dictionary=dictionary, gemini_pool=gemini_pool, web_fetcher=web_fetcher)
+practice_games = PracticeGames(gemini_pool=gemini_pool)
+rate_limit_buckets = SharedTokenBuckets(settings.rate_limit_path, settings.rate_limit_slots)
+watchdog = LoopWatchdog(settings.profiling_stall_threshold) if settings.profiling_stall_threshold > 0 else None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open the HTTP connection pools, load the IPA table and start the
+    event loop monitors on startup, and release them on shutdown.
+    """
+    await http_client.start()
+    await web_fetcher.http_client.start()
+    phonetics.start()
+    if watchdog is not None:
+        watchdog.start()
+    lag_monitor = None
+    if settings.metrics_enabled:
+        lag_monitor = asyncio.create_task(monitor_event_loop_lag(settings.metrics_loop_lag_interval))
+    try:
+        yield
+    finally:
+        if lag_monitor is not None:
+            lag_monitor.cancel()
+        if watchdog is not None:
+            watchdog.stop()
+        await http_client.close()
+        await web_fetcher.http_client.close()
+        phonetics.close()
+        web_fetcher.close()
+        practice_games.close()
+        rate_limit_buckets.close()
+        for cache in (dictionary.cache, vocabulary_manager.cache, practice_games.cache):
+            if cache is not None:
+                cache.close()
+        if dictionary.local_index is not None:
+            dictionary.local_index.close()
 
 app = FastAPI(
     title="Dictionary Lookup API",
     description="A simple API for looking up word definitions",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+if settings.rate_limit_enabled:
+    # Added before CORS so that rejections still carry the CORS headers
+    app.add_middleware(
+        RateLimitMiddleware,
+        buckets=rate_limit_buckets,
+        limits=[
+            ("llm", settings.llm_routes, settings.llm_rate_limit, settings.rate_limit_period),
+            ("default", [], settings.rate_limit, settings.rate_limit_period),
+        ],
+        exempt=settings.rate_limit_exempt,
+        trusted_proxies=settings.trusted_proxy_hops if settings.trust_forwarded_for else 0,
+        # Batches are charged per word / URL
+        batch_fields={"/lookup/batch": "words", "/web/fetch/batch": "urls"}
+    )
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -24,10 +105,46 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-# Initialize services
-dictionary = Dictionary()
-vocabulary_manager = VocabularyManager()
-practice_games = PracticeGames()
+if settings.profiling_enabled:
+    app.add_middleware(
+        ProfilingMiddleware,
+        output_dir=settings.profiling_output_dir,
+        interval=settings.profiling_sample_interval,
+        token=settings.profiling_token
+    )
+
+if settings.metrics_enabled:
+    # Added last so that it is the outermost middleware and times everything
+    app.add_middleware(MetricsMiddleware)
+
+
+def _caches() -> Dict[str, Any]:
+    return {
+        "lookup": dictionary.cache,
+        "vocab": vocabulary_manager.cache,
+        "quiz": practice_games.cache,
+        "web": web_fetcher.cache
+    }
+
+
+def _collect_cache_metrics():
+    """Expose the cache counters of /cache/stats as metrics at scrape time."""
+    hits = Counter("cache_hits_total", "Cache hits by cache and tier", ("cache", "tier"))
+    misses = Counter("cache_misses_total", "Cache misses by cache and tier", ("cache", "tier"))
+    ratio = Gauge("cache_hit_ratio", "Cache hits / lookups since startup", ("cache", "tier"))
+    tiers = []
+    for name, cache in _caches().items():
+        if cache is not None:
+            tiers += [(name, tier, stats) for tier, stats in cache.stats().items()]
+    tiers.append(("phonetics", "memo", phonetics.stats()["memo"]))
+    for name, tier, stats in tiers:
+        hits.labels(name, tier).inc(stats["hits"])
+        misses.labels(name, tier).inc(stats["misses"])
+        ratio.labels(name, tier).set(stats["hit_ratio"])
+    return [hits, misses, ratio]
+
+
+REGISTRY.register_collector(_collect_cache_metrics)
 
 @app.get("/", response_model=HealthResponse, tags=["Health"])
 async def health_check():
@@ -60,13 +177,114 @@ async def lookup_word(word: str):
     return await dictionary.lookup_word_base_en(cleaned_word)
 
 
+@app.post("/lookup/batch", tags=["Dictionary"])
+async def lookup_batch(
+    words: List[str] = Body(..., embed=True, description="Words to look up"),
+    stream: bool = Query(False, description="Stream results as NDJSON in completion order")
+):
+    """
+    Look up many words at once.
+    
+    Words are validated and deduplicated, then looked up concurrently.
+    
+    Args:
+        words: The words to look up
+        stream: Return one JSON object per line as soon as each lookup completes
+        
+    Returns:
+        Per-word results: word, found flag and dictionary entries (null for misses)
+    """
+    if not words:
+        raise HTTPException(
+            status_code=400,
+            detail="Word list is empty"
+        )
+    if len(words) > settings.dictionary_api_batch_max_words:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.dictionary_api_batch_max_words} words can be looked up at once"
+        )
+    
+    # Validate and deduplicate, keeping the first-seen order
+    invalid = []
+    unique_words = {}
+    for word in words:
+        cleaned_word = validate_word(word)
+        if cleaned_word:
+            unique_words.setdefault(cleaned_word, None)
+        else:
+            invalid.append({"word": word, "found": False, "entries": None, "error": "Invalid word provided"})
+    
+    def to_result(word, entries):
+        return {"word": word, "found": bool(entries), "entries": entries}
+    
+    if stream:
+        async def generate():
+            for result in invalid:
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+            async for word, entries in dictionary.lookup_batch(list(unique_words)):
+                yield json.dumps(to_result(word, entries), ensure_ascii=False) + "\n"
+        
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+    
+    async for word, entries in dictionary.lookup_batch(list(unique_words)):
+        unique_words[word] = entries
+    return {"results": [to_result(word, entries) for word, entries in unique_words.items()] + invalid}
+
+
+@app.get("/cache/stats", tags=["Health"])
+async def cache_stats():
+    """
+    Get hit/miss/eviction counters of the lookup and LLM result caches and
+    of the IPA conversion memo, and quiz question bank usage.
+    
+    Returns:
+        Counters per cache and tier, or an empty object for disabled caches
+    """
+    stats = {name: cache.stats() if cache is not None else {} for name, cache in _caches().items()}
+    stats["phonetics"] = phonetics.stats()
+    stats["question_bank"] = practice_games.bank.stats() if practice_games.bank is not None else {}
+    return stats
+
+
+@app.get("/upstreams/stats", tags=["Health"])
+async def upstream_stats():
+    """
+    Get circuit breaker state and retry/hedge counters of the upstream services.
+
+    Counters are per worker process.
+    """
+    return {
+        policy.name: policy.stats()
+        for policy in (dictionary.resilience, gemini_pool.resilience, web_fetcher.resilience)
+    }
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def metrics():
+    """
+    Get request, upstream call and cache metrics in the Prometheus text format.
+    
+    Metrics are per worker process.
+    """
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.post("/vocab/extract_text", tags=["Vocabulary"])
-async def get_vocab_text(text: str = Body(..., description="Text to extract vocabulary from")):
+async def get_vocab_text(
+    text: str = Body(..., description="Text to extract vocabulary from"),
+    fresh: bool = Query(False, description="Bypass the result cache and generate new output"),
+    mode: Optional[str] = Query(None, pattern="^(llm|local)$", description="Extraction mode: llm or local (no LLM)")
+):
     """
     Extract vocabulary words from provided text.
     
     Args:
         text: The text to analyze for vocabulary extraction
+        fresh: Bypass the result cache
+        mode: "llm" or "local"; defaults to the configured extraction mode
         
     Returns:
         List of vocabulary words with definitions, examples, and difficulty levels
@@ -78,15 +296,104 @@ async def get_vocab_text(text: str = Body(..., description="Text to extract voca
         )
     
     # Extract vocabulary from text using the vocabulary manager service
-    return await vocabulary_manager.get_vocab_text(text)
+    return await vocabulary_manager.get_vocab_text(text, fresh=fresh, mode=mode)
+
+@app.post("/vocab/extract_text/stream", tags=["Vocabulary"])
+async def stream_vocab_text(
+    text: str = Body(..., description="Text to extract vocabulary from"),
+    fresh: bool = Query(False, description="Bypass the result cache and generate new output")
+):
+    """
+    Extract vocabulary words from provided text, streaming each word as NDJSON.
+    
+    Each line is a vocabulary word, written as soon as the model has produced
+    it and its phonetic information is available. The stream always ends
+    with a terminal line: {"done": true, "count": <words sent>} on success
+    (also when the model found no words), or a line with an "error" key if
+    the model fails after some words were sent.
+    
+    Args:
+        text: The text to analyze for vocabulary extraction
+        fresh: Bypass the result cache
+        
+    Returns:
+        NDJSON stream of vocabulary words
+    """
+    if not text or len(text.strip()) < 10:
+        raise HTTPException(
+            status_code=400,
+            detail="Text is too short or empty"
+        )
+    
+    words = vocabulary_manager.stream_vocab_text(text, fresh=fresh)
+    # Wait for the first word before answering, so that failures which happen
+    # before anything was produced still map to a proper HTTP status
+    try:
+        first = await words.__anext__()
+    except StopAsyncIteration:
+        first = None
+    
+    async def generate():
+        count = 0
+        try:
+            if first is not None:
+                yield json.dumps(first, ensure_ascii=False) + "\n"
+                count += 1
+                async for entry in words:
+                    yield json.dumps(entry, ensure_ascii=False) + "\n"
+                    count += 1
+        except HTTPException as e:
+            yield json.dumps({"error": e.detail}) + "\n"
+            return
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+            return
+        finally:
+            await words.aclose()
+        yield json.dumps({"done": True, "count": count}) + "\n"
+    
+    # The background task closes the generator when the client leaves before the body is started
+    return StreamingResponse(generate(), media_type="application/x-ndjson", background=BackgroundTask(words.aclose))
+
+@app.post("/vocab/extract_url", tags=["Vocabulary"])
+async def get_vocab_url(
+    payload: Dict[str, str] = Body(..., description="JSON payload with the URL of the page to extract vocabulary from"),
+    fresh: bool = Query(False, description="Bypass the caches and fetch and extract again"),
+    mode: Optional[str] = Query(None, pattern="^(llm|local)$", description="Extraction mode: llm or local (no LLM)")
+):
+    """
+    Extract vocabulary words from a web page.
+    
+    The page is fetched, cleaned and analyzed server-side in one request.
+    
+    Args:
+        payload: JSON body containing 'url' key with the URL of the page
+        fresh: Bypass the caches
+        mode: "llm" or "local"; defaults to the configured extraction mode
+        
+    Returns:
+        List of vocabulary words with definitions, examples, and phonetics
+    """
+    url = payload.get("url")
+    if not url or not url.startswith(('http://', 'https://')):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid URL provided. URL must start with http:// or https://"
+        )
+    
+    return await vocabulary_manager.get_vocab_url(url, fresh=fresh, mode=mode)
 
 @app.post("/web/fetch", tags=["WebContent"])
-async def fetch_web_content(payload: Dict[str, str] = Body(..., description="JSON payload with URL to fetch content from")):
+async def fetch_web_content(
+    payload: Dict[str, str] = Body(..., description="JSON payload with URL to fetch content from"),
+    fresh: bool = Query(False, description="Bypass the URL cache and extract the page again")
+):
     """
-    Fetch content from a specified URL using FetchFox.
+    Fetch content from a specified URL (extracted locally, or with FetchFox).
     
     Args:
         payload: JSON body containing 'url' key with the URL to fetch content from
+        fresh: Bypass the URL cache
         
     Returns:
         Structured content from the web page including text, markdown, and metadata
@@ -98,18 +405,82 @@ async def fetch_web_content(payload: Dict[str, str] = Body(..., description="JSO
             detail="Invalid URL provided. URL must start with http:// or https://"
         )
     
-    # Create a new WebFetcher instance for each request to avoid resource conflicts
-    web_fetcher = WebFetcher()
-    return await web_fetcher.fetch_content(url)
+    return await web_fetcher.fetch_content(url, fresh=fresh)
+
+@app.post("/web/fetch/batch", tags=["WebContent"])
+async def fetch_web_content_batch(
+    urls: List[str] = Body(..., embed=True, description="URLs to fetch content from"),
+    deadline: Optional[float] = Query(None, gt=0, description="Time budget for the whole batch, in seconds"),
+    fresh: bool = Query(False, description="Bypass the URL cache and extract the pages again")
+):
+    """
+    Fetch content from many URLs at once.
+    
+    URLs are validated and deduplicated, then fetched concurrently with a
+    limit per host. Results are streamed as NDJSON, one object per URL in
+    completion order; URLs that could not be fetched (including those still
+    pending when the deadline passes) carry an error and its status code.
+    
+    Args:
+        urls: The URLs to fetch content from
+        deadline: Time budget for the whole batch (default and maximum: the configured batch deadline)
+        fresh: Bypass the URL cache
+        
+    Returns:
+        NDJSON stream of per-URL results: url, ok flag and content or error
+    """
+    if not urls:
+        raise HTTPException(
+            status_code=400,
+            detail="URL list is empty"
+        )
+    if len(urls) > settings.web_fetcher_batch_max_urls:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.web_fetcher_batch_max_urls} URLs can be fetched at once"
+        )
+    
+    # Validate and deduplicate (ignoring fragments), keeping the first-seen order
+    invalid = []
+    unique_urls = {}
+    for url in urls:
+        url = url.strip() if isinstance(url, str) else ""
+        if url.startswith(('http://', 'https://')):
+            unique_urls.setdefault(urldefrag(url)[0], url)
+        else:
+            invalid.append({
+                "url": url, "ok": False, "status": 400,
+                "error": "Invalid URL provided. URL must start with http:// or https://"
+            })
+    
+    deadline = min(deadline or settings.web_fetcher_batch_deadline, settings.web_fetcher_batch_deadline)
+    
+    async def generate():
+        for result in invalid:
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+        async for url, content, error in web_fetcher.fetch_batch(list(unique_urls.values()), deadline, fresh=fresh):
+            if error is None:
+                result = {"url": url, "ok": True, "content": content}
+            else:
+                result = {"url": url, "ok": False, "status": error.status_code, "error": error.detail}
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 @app.post("/practice/quiz", tags=["Practice"])
-async def generate_quiz(word_list: List[Dict[str, Any]] = Body(..., description="List of words with their information to generate quiz from")):
+async def generate_quiz(
+    word_list: List[Dict[str, Any]] = Body(..., description="List of words with their information to generate quiz from"),
+    fresh: bool = Query(False, description="Bypass the result cache and generate a new quiz"),
+    mode: Optional[str] = Query(None, pattern="^(llm|local)$", description="Quiz engine: llm or local (no LLM)")
+):
     """
     Generate a quiz session from a list of words.
     
     Args:
         word_list: List of dictionaries containing word information
                   Each dict should have 'word', 'definition', and 'example' keys
+        fresh: Bypass the result cache
+        mode: "llm" or "local"; defaults to the configured quiz engine
         
     Returns:
         List of quiz questions with multiple choice options
@@ -130,5 +501,5 @@ async def generate_quiz(word_list: List[Dict[str, Any]] = Body(..., description=
             )
     
     # Generate quiz using practice games service
-    return await practice_games.gen_quiz_sess(word_list)
+    return await practice_games.gen_quiz_sess(word_list, fresh=fresh, mode=mode)
 
@@ -1,4 +1,6 @@
 from .dictionary import Dictionary
+from .http_client import HttpClient
+from .phonetics import PhoneticsService
 from .web_fetcher import WebFetcher
 
-__all__ = ['Dictionary', 'WebFetcher']
\ No newline at end of file
+__all__ = ['Dictionary', 'HttpClient', 'PhoneticsService', 'WebFetcher']
\ No newline at end of file
@@ -1,26 +1,67 @@
 import re
 import json
 import random
+import asyncio
 
 import requests
 import aiohttp
-import eng_to_ipa as ipa
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 from fastapi import HTTPException
 from google import genai
 from google.genai import types
 
 from app.config import settings
+from app.services.http_client import HttpClient
+from app.services.local_dictionary import LocalDictionaryIndex
+from app.services.phonetics import PhoneticsService
+from app.utils.cache import MISSING, TieredCache, create_tiered_cache
+from app.utils.metrics import track_upstream
+from app.utils.resilience import UpstreamPolicy
+from app.utils.singleflight import SingleFlight
 
 
+def _is_transient(error: BaseException) -> bool:
+    """Whether a dictionary API error is worth retrying (transport errors, 429 and 5xx)."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, aiohttp.ClientError)
+
 
 class Dictionary:
     """Service class for handling dictionary operations."""
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[HttpClient] = None, phonetics: Optional[PhoneticsService] = None):
         self.api_url = settings.dictionary_api_url
         self.timeout = settings.dictionary_api_timeout
         self.max_retries = settings.dictionary_api_max_retries
+        self.batch_concurrency = settings.dictionary_api_batch_concurrency
+        self.http_client = http_client or HttpClient()
+        self.phonetics = phonetics or PhoneticsService()
+        self.cache = self._create_cache() if settings.lookup_cache_enabled else None
+        self.resilience = UpstreamPolicy(
+            "dictionary_api",
+            retryable=_is_transient,
+            max_retries=self.max_retries,
+            deadline=settings.dictionary_api_deadline,
+            hedge_percentile=settings.dictionary_api_hedge_percentile
+        )
+        self._flights = SingleFlight()
+        self.local_index = (
+            LocalDictionaryIndex(settings.local_dictionary_path)
+            if settings.dictionary_backend == "local" else None
+        )
+    
+    @staticmethod
+    def _create_cache() -> TieredCache:
+        """Create the lookup cache from the [lookup_cache] settings."""
+        return create_tiered_cache(
+            memory_size=settings.lookup_cache_memory_size,
+            ttl=settings.lookup_cache_ttl,
+            disk_path=settings.lookup_cache_disk_path,
+            table="lookup_cache",
+            disk_max_entries=settings.lookup_cache_disk_max_entries,
+            stale_ttl=settings.lookup_cache_stale_ttl
+        )
     
     async def lookup_word_base_en(self, word: str) -> List[Dict[str, Any]] | None:
         """
@@ -32,78 +73,170 @@ class Dictionary:
         Returns:
             List of dictionary entries for the word in simplified format or None if not found
         """
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    self.api_url.format(word=word),
-                    timeout=self.timeout
-                ) as response:
-                    if response.status != 200:
-                        return None
-                    
-                    data = await response.json()
-                    
-                    # Transform the response to the required format
-                    result = []
-                    for entry in data:
-                        transformed_entry = {
-                            "word": entry.get("word", word),
-                            "phonetic": {},
-                            "meanings": []
-                        }
-                        
-                        # Handle phonetics
-                        phonetic_text = None
-                        audio_url = None
-                        
-                        # Try to get phonetic text from the API response
-                        if "phonetics" in entry and entry["phonetics"]:
-                            for phonetic in entry["phonetics"]:
-                                if "text" in phonetic and phonetic["text"]:
-                                    phonetic_text = phonetic["text"]
-                                    if "audio" in phonetic and phonetic["audio"]:
-                                        audio_url = phonetic["audio"]
-                                    break
-                        
-                        # If no phonetic text found, use eng_to_ipa as fallback
-                        if not phonetic_text:
-                            try:
-                                phonetic_text = ipa.convert(word)
-                            except Exception:
-                                phonetic_text = ""
-                        
-                        transformed_entry["phonetic"] = {
-                            "text": phonetic_text,
-                            "audio": audio_url or ""
-                        }
-                        
-                        # Handle meanings
-                        if "meanings" in entry:
-                            for meaning in entry["meanings"]:
-                                transformed_meaning = {
-                                    "partOfSpeech": meaning.get("partOfSpeech", ""),
-                                    "definitions": []
-                                }
-                                
-                                if "definitions" in meaning:
-                                    for definition in meaning["definitions"]:
-                                        transformed_definition = {
-                                            "definition": definition.get("definition", ""),
-                                            "example": definition.get("example", "")
-                                        }
-                                        transformed_meaning["definitions"].append(transformed_definition)
-                                
-                                transformed_entry["meanings"].append(transformed_meaning)
-                        
-                        result.append(transformed_entry)
-                    
-                    return result
+        data = await self.fetch_entries(word)
+        if not data:
+            return None
         
-        except aiohttp.ClientError:
+        try:
+            # Entries without phonetic text share one IPA conversion of the word
+            fallback_phonetic = ""
+            if not all(self._find_phonetic(entry)[0] for entry in data):
+                fallback_phonetic = await self.phonetics.convert(word)
+            return self._transform_entries(word, data, fallback_phonetic)
+        except Exception:
             return None
+    
+    async def lookup_batch(self, words: List[str]) -> AsyncIterator[Tuple[str, List[Dict[str, Any]] | None]]:
+        """
+        Look up many words concurrently, yielding results as they complete.
+        
+        At most ``batch_concurrency`` lookups run at the same time. Lookups
+        still pending when the consumer stops iterating are cancelled.
+        
+        Args:
+            words: The words to look up (expected to be validated and unique)
+            
+        Yields:
+            Tuples of (word, entries in simplified format or None if not found)
+        """
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        
+        async def lookup(word: str) -> Tuple[str, List[Dict[str, Any]] | None]:
+            async with semaphore:
+                return word, await self.lookup_word_base_en(word)
+        
+        tasks = [asyncio.ensure_future(lookup(word)) for word in words]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def fetch_entries(self, word: str) -> List[Dict[str, Any]] | None:
+        """
+        Get the raw dictionary API entries for a word, going through the lookup cache.
+        
+        With the local backend the offline index is consulted first and the
+        remote API is only used for words missing from it. Definitive "not
+        found" answers are cached for a shorter time (negative caching);
+        transport and server errors are never cached. API requests are
+        retried, hedged and circuit-broken by ``resilience``; when the API
+        still fails, an expired cache entry is served if one is left.
+        
+        Args:
+            word: The word to look up
+            
+        Returns:
+            List of entries as returned by the dictionary API or None if not found
+        """
+        key = word.strip().lower()
+        if self.local_index is not None:
+            data = self.local_index.lookup(key)
+            if data or not settings.local_dictionary_remote_fallback:
+                return data
+        
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not MISSING:
+                return cached
+        
+        # Concurrent lookups of the same word share a single upstream request
+        return await self._flights.do(key, lambda: self._fetch_and_cache(word, key))
+    
+    async def _fetch_and_cache(self, word: str, key: str) -> List[Dict[str, Any]] | None:
+        try:
+            data = await self.resilience.call(lambda: self._request_entries(word))
         except Exception:
+            # Circuit open, deadline passed or retries exhausted: stale beats nothing
+            if self.cache is not None:
+                stale = await self.cache.get_stale(key)
+                if stale is not MISSING:
+                    return stale
             return None
         
+        if self.cache is not None:
+            ttl = settings.lookup_cache_ttl if data else settings.lookup_cache_negative_ttl
+            await self.cache.set(key, data, ttl=ttl)
+        return data
+    
+    async def _request_entries(self, word: str) -> List[Dict[str, Any]] | None:
+        """
+        Request a word from the dictionary API.
+        
+        Returns:
+            List of raw entries, or None if the API does not know the word
+            
+        Raises:
+            aiohttp.ClientError: On transport errors and unexpected status codes
+        """
+        with track_upstream("dictionary_api"):
+            async with self.http_client.session.get(self.api_url.format(word=word)) as response:
+                if response.status == 404:
+                    return None
+                response.raise_for_status()
+                data = await response.json()
+        
+        return data if isinstance(data, list) and data else None
+    
+    @staticmethod
+    def _find_phonetic(entry: Dict[str, Any]) -> Tuple[str | None, str | None]:
+        """Get the first phonetic text (and its audio URL) of a raw entry."""
+        if "phonetics" in entry and entry["phonetics"]:
+            for phonetic in entry["phonetics"]:
+                if "text" in phonetic and phonetic["text"]:
+                    return phonetic["text"], phonetic.get("audio") or None
+        return None, None
+    
+    def _transform_entries(self, word: str, data: List[Dict[str, Any]], fallback_phonetic: str = "") -> List[Dict[str, Any]]:
+        """
+        Transform raw dictionary API entries to the simplified response format.
+        
+        Args:
+            word: The word that was looked up
+            data: Raw dictionary API entries
+            fallback_phonetic: IPA used for entries without phonetic text
+        """
+        result = []
+        for entry in data:
+            transformed_entry = {
+                "word": entry.get("word", word),
+                "phonetic": {},
+                "meanings": []
+            }
+            
+            # Handle phonetics, using the converted IPA as fallback
+            phonetic_text, audio_url = self._find_phonetic(entry)
+            if not phonetic_text:
+                phonetic_text = fallback_phonetic
+            
+            transformed_entry["phonetic"] = {
+                "text": phonetic_text,
+                "audio": audio_url or ""
+            }
+            
+            # Handle meanings
+            if "meanings" in entry:
+                for meaning in entry["meanings"]:
+                    transformed_meaning = {
+                        "partOfSpeech": meaning.get("partOfSpeech", ""),
+                        "definitions": []
+                    }
+                    
+                    if "definitions" in meaning:
+                        for definition in meaning["definitions"]:
+                            transformed_definition = {
+                                "definition": definition.get("definition", ""),
+                                "example": definition.get("example", "")
+                            }
+                            transformed_meaning["definitions"].append(transformed_definition)
+                    
+                    transformed_entry["meanings"].append(transformed_meaning)
+            
+            result.append(transformed_entry)
+        
+        return result
+        
     async def lookup_word(self, word: str, target_lang: str) -> List[Dict[str, Any]]:
         """
         Look up a word in the dictionary and optionally translate to target language.
@@ -0,0 +1,269 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, List, Optional
+
+from fastapi import HTTPException
+from google import genai
+from google.genai import errors
+
+from app.config import settings
+from app.utils.metrics import track_upstream
+from app.utils.resilience import CircuitOpenError, UpstreamPolicy
+from app.utils.token_bucket import TokenBucket
+
+
+class KeysEjectedError(Exception):
+    """Every usable key is ejected after recent quota or server errors."""
+
+
+class _KeySlot:
+    """A Gemini client bound to one API key, with its quota and health state."""
+
+    def __init__(self, index: int, client: genai.Client, bucket: TokenBucket):
+        self.index = index
+        self.client = client
+        self.bucket = bucket
+        self.in_flight = 0
+        self.ejected_until = 0.0
+
+    def is_ejected(self, now: float) -> bool:
+        return self.ejected_until > now
+
+
+class GeminiClientPool:
+    """
+    Shared pool of async Gemini clients, one per API key.
+
+    Each request is routed to the healthy key with free quota (per-key token
+    bucket) and the fewest requests in flight. Keys answering with a quota
+    (429) or server (5xx) error are ejected for ``eject_seconds`` and the
+    request is retried once on each remaining key. Once every key is
+    ejected, requests fail with 503 right away instead of waiting for a key
+    to come back; ``resilience`` counts these rounds toward its circuit
+    breaker, bounds each generation with a deadline and can retry a failed
+    round after a backoff (useful when ``eject_seconds`` is short).
+    """
+
+    def __init__(
+        self,
+        api_keys: Optional[List[str]] = None,
+        model_name: Optional[str] = None,
+        base_url: Optional[str] = None,
+        requests_per_minute: Optional[float] = None,
+        eject_seconds: Optional[float] = None,
+        acquire_timeout: Optional[float] = None,
+    ):
+        api_keys = api_keys if api_keys is not None else settings.api_keys
+        self.model_name = model_name or settings.gemini_model_name
+        requests_per_minute = requests_per_minute or settings.gemini_requests_per_minute
+        self.eject_seconds = eject_seconds if eject_seconds is not None else settings.gemini_eject_seconds
+        self.acquire_timeout = acquire_timeout if acquire_timeout is not None else settings.gemini_acquire_timeout
+        base_url = base_url if base_url is not None else settings.gemini_base_url
+        http_options = {"base_url": base_url} if base_url else None
+
+        self._slots = [
+            _KeySlot(
+                index=i,
+                client=genai.Client(api_key=key, http_options=http_options),
+                bucket=TokenBucket(rate=requests_per_minute / 60.0, capacity=max(1.0, requests_per_minute / 6.0))
+            )
+            for i, key in enumerate(api_keys)
+        ]
+        self._available = asyncio.Condition()
+        self.resilience = UpstreamPolicy(
+            "gemini",
+            retryable=lambda e: isinstance(e, KeysEjectedError) or (
+                isinstance(e, errors.APIError) and self._is_retryable(e)
+            ),
+            max_retries=settings.gemini_max_retries,
+            deadline=settings.gemini_deadline,
+            hedge_percentile=settings.gemini_hedge_percentile
+        )
+
+    @staticmethod
+    def _is_retryable(error: errors.APIError) -> bool:
+        return error.code == 429 or (error.code or 0) >= 500
+
+    @staticmethod
+    def _unavailable() -> HTTPException:
+        return HTTPException(
+            status_code=503,
+            detail="AI service is temporarily unavailable, please try again later"
+        )
+
+    def _pick(self, excluded: set) -> Optional[_KeySlot]:
+        """Pick the least loaded healthy slot with free quota, taking one token."""
+        now = time.monotonic()
+        candidates = [
+            slot for slot in self._slots
+            if slot.index not in excluded and not slot.is_ejected(now) and slot.bucket.available() >= 1
+        ]
+        if not candidates:
+            return None
+        slot = min(candidates, key=lambda s: (s.in_flight, -s.bucket.tokens))
+        slot.bucket.try_acquire()
+        return slot
+
+    def _wait_time(self, excluded: set) -> float:
+        """Get the time until some slot may become usable."""
+        now = time.monotonic()
+        waits = [
+            max(slot.ejected_until - now, slot.bucket.time_until_available())
+            for slot in self._slots if slot.index not in excluded
+        ]
+        return min(waits) if waits else float("inf")
+
+    async def _acquire(self, excluded: set, deadline: float) -> _KeySlot:
+        async with self._available:
+            while True:
+                slot = self._pick(excluded)
+                if slot is not None:
+                    slot.in_flight += 1
+                    return slot
+
+                remaining = deadline - time.monotonic()
+                wait = self._wait_time(excluded)
+                if remaining <= 0 or wait > remaining:
+                    # Nothing frees up in time; do not sit out the whole timeout
+                    now = time.monotonic()
+                    if any(slot.is_ejected(now) for slot in self._slots if slot.index not in excluded):
+                        raise KeysEjectedError()
+                    raise self._unavailable()
+                try:
+                    await asyncio.wait_for(self._available.wait(), timeout=max(wait, 0.01))
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _release(self, slot: _KeySlot, failed: bool) -> None:
+        slot.in_flight -= 1
+        if failed:
+            slot.ejected_until = time.monotonic() + self.eject_seconds
+        async with self._available:
+            self._available.notify_all()
+
+    async def generate_content(self, contents: Any, model: Optional[str] = None, config: Any = None) -> Any:
+        """
+        Generate content with the async Gemini API.
+
+        Args:
+            contents: Prompt contents as accepted by ``generate_content``
+            model: Model name (default: the configured model)
+            config: Optional generation config
+
+        Returns:
+            The GenerateContentResponse
+
+        Raises:
+            HTTPException: 503 when no key could answer
+        """
+        try:
+            return await self.resilience.call(lambda: self._generate_content(contents, model, config))
+        except errors.APIError as e:
+            if not self._is_retryable(e):
+                raise
+            raise self._unavailable()
+        except (CircuitOpenError, KeysEjectedError, asyncio.TimeoutError):
+            raise self._unavailable()
+
+    async def _generate_content(self, contents: Any, model: Optional[str], config: Any) -> Any:
+        """Try each healthy key once; raises the last quota or server error if all of them fail."""
+        deadline = time.monotonic() + self.acquire_timeout
+        excluded = set()
+        while True:
+            slot = await self._acquire(excluded, deadline)
+            failed = False
+            try:
+                with track_upstream("gemini"):
+                    return await slot.client.aio.models.generate_content(
+                        model=model or self.model_name,
+                        contents=contents,
+                        config=config
+                    )
+            except errors.APIError as e:
+                if not self._is_retryable(e):
+                    raise
+                failed = True
+                excluded.add(slot.index)
+                if len(excluded) >= len(self._slots):
+                    raise
+            finally:
+                await self._release(slot, failed)
+
+    async def generate_content_stream(
+        self, contents: Any, model: Optional[str] = None, config: Any = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate content with streaming, yielding text chunks as they arrive.
+
+        The SDK's streaming iterator reads the HTTP response synchronously, so
+        each chunk is pulled in a worker thread to keep the event loop free.
+        Failover to another key is only possible before the first chunk.
+        Streams are not retried or hedged, but are refused while the circuit
+        is open and their outcome before the first chunk feeds the breaker.
+
+        Args:
+            contents: Prompt contents as accepted by ``generate_content_stream``
+            model: Model name (default: the configured model)
+            config: Optional generation config
+
+        Yields:
+            Text of each response chunk
+        """
+        breaker = self.resilience.breaker
+        if not breaker.allow():
+            raise self._unavailable()
+        deadline = time.monotonic() + self.acquire_timeout
+        excluded = set()
+        while True:
+            try:
+                slot = await self._acquire(excluded, deadline)
+            except KeysEjectedError:
+                breaker.record_failure()
+                raise self._unavailable()
+            failed = False
+            started = False
+            chunks = slot.client.models.generate_content_stream(
+                model=model or self.model_name,
+                contents=contents,
+                config=config
+            )
+            try:
+                # Tracked separately: the duration covers the whole stream
+                with track_upstream("gemini_stream"):
+                    while True:
+                        chunk = await asyncio.to_thread(next, chunks, None)
+                        if chunk is None:
+                            return
+                        if not started:
+                            breaker.record_success()
+                        started = True
+                        if chunk.text:
+                            yield chunk.text
+            except errors.APIError as e:
+                if started or not self._is_retryable(e):
+                    raise
+                failed = True
+                excluded.add(slot.index)
+                if len(excluded) >= len(self._slots):
+                    breaker.record_failure()
+                    raise self._unavailable()
+            finally:
+                try:
+                    chunks.close()
+                except ValueError:
+                    # Still running in its worker thread (consumer was cancelled)
+                    pass
+                await self._release(slot, failed)
+
+    def stats(self) -> List[dict]:
+        """Get per-key load and health information (keys are not exposed)."""
+        now = time.monotonic()
+        return [
+            {
+                "key": slot.index,
+                "in_flight": slot.in_flight,
+                "tokens": round(slot.bucket.available(), 2),
+                "ejected_for": round(max(slot.ejected_until - now, 0.0), 1)
+            }
+            for slot in self._slots
+        ]
@@ -0,0 +1,226 @@
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+# Content of these elements is never part of the article
+_SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "button", "select", "textarea", "nav", "aside", "footer",
+}
+
+_VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+}
+
+# Elements that start a new block of text
+_BLOCK_TAGS = {
+    "address", "article", "blockquote", "body", "dd", "div", "dl", "dt",
+    "figcaption", "figure", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hr", "li", "main", "ol", "p", "pre", "section", "table", "td", "th",
+    "tr", "ul", "form",
+} | _SKIP_TAGS
+
+# Elements whose text scores their parent (and grandparent) rather than themselves
+_PARAGRAPH_TAGS = {"p", "pre", "blockquote", "li", "dd", "td", "h2", "h3", "h4", "h5", "h6"}
+
+_TAG_WEIGHTS = {
+    "article": 10, "main": 10, "div": 5, "section": 3, "pre": 3, "td": 3,
+    "blockquote": 3, "address": -3, "ol": -3, "ul": -3, "dl": -3, "dd": -3,
+    "dt": -3, "li": -3, "form": -3, "header": -10, "h1": -5, "h2": -5,
+    "h3": -5, "h4": -5, "h5": -5, "h6": -5, "th": -5,
+}
+
+_POSITIVE = re.compile(r"article|body|content|entry|hentry|main|page|post|text|blog|story", re.I)
+_NEGATIVE = re.compile(
+    r"combx|comment|com-|contact|foot|footer|footnote|masthead|media|meta|nav|outbrain|promo|"
+    r"related|scroll|share|shoutbox|sidebar|skyscraper|sponsor|shopping|tags|tool|widget|banner|"
+    r"breadcrumb|cookie|menu|popup|subscribe|advert", re.I
+)
+
+# Blocks shorter than this do not add to their container's score
+_MIN_BLOCK_CHARS = 25
+
+
+class ArticleExtractor(HTMLParser):
+    """
+    Incremental readability-style article extractor.
+
+    HTML is fed in chunks as it is downloaded. While parsing, the extractor
+    only records a flat table of elements (parent, tag, class/id weight) and
+    the text blocks found inside them; scoring happens in result(). Each
+    block with enough text scores its container (and half of that goes to
+    the container's parent), weighted by commas and length; containers are
+    then adjusted by their class/id names and penalized by link density. The
+    best container and its well-scored siblings make up the content.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parents: List[int] = [-1]
+        self._tags: List[str] = ["#root"]
+        self._weights: List[float] = [0.0]
+        self._stack: List[int] = [0]
+        self._skip_depth = 0
+        self._link_depth = 0
+        self._text: List[str] = []
+        self._link_chars = 0
+        self._blocks: List[Tuple[int, str, int]] = []
+        self._in_title = False
+        self._title: List[str] = []
+        self._h1: Optional[str] = None
+        self._meta: Dict[str, str] = {}
+
+    def _flush(self) -> None:
+        """End the current text block, attributing it to the innermost open element."""
+        if not self._text:
+            return
+        text = " ".join("".join(self._text).split())
+        if text:
+            node = self._stack[-1]
+            self._blocks.append((node, text, min(self._link_chars, len(text))))
+            if self._h1 is None and self._tags[node] == "h1":
+                self._h1 = text
+        self._text = []
+        self._link_chars = 0
+
+    def _pop(self) -> None:
+        node = self._stack.pop()
+        if self._tags[node] in _SKIP_TAGS:
+            self._skip_depth -= 1
+        elif self._tags[node] == "a":
+            self._link_depth -= 1
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attributes = dict(attrs)
+            name = (attributes.get("name") or attributes.get("property") or "").lower()
+            if name in ("description", "og:description", "twitter:description", "og:title") and attributes.get("content"):
+                self._meta.setdefault(name, attributes["content"].strip())
+            return
+        if tag == "title":
+            self._in_title = True
+            return
+        if tag == "br":
+            self._text.append(" ")
+            return
+
+        if tag in _BLOCK_TAGS:
+            self._flush()
+            # A paragraph is implicitly closed by any block, a list item by the next item
+            top = self._tags[self._stack[-1]]
+            if top == "p" or (top == "li" and tag == "li"):
+                self._pop()
+        if tag in _VOID_TAGS:
+            return
+
+        weight = float(_TAG_WEIGHTS.get(tag, 0))
+        names = " ".join(value for name, value in attrs if name in ("class", "id") and value)
+        if names:
+            if _NEGATIVE.search(names):
+                weight -= 25
+            if _POSITIVE.search(names):
+                weight += 25
+
+        self._parents.append(self._stack[-1])
+        self._tags.append(tag)
+        self._weights.append(weight)
+        self._stack.append(len(self._tags) - 1)
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "a":
+            self._link_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_TAGS and tag not in ("meta", "title"):
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+            return
+        if tag in _BLOCK_TAGS:
+            self._flush()
+
+        # Close up to the matching element; stray end tags are ignored
+        for depth in range(len(self._stack) - 1, 0, -1):
+            if self._tags[self._stack[depth]] == tag:
+                while len(self._stack) > depth:
+                    self._pop()
+                break
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title.append(data)
+            return
+        if self._skip_depth:
+            return
+        self._text.append(data)
+        if self._link_depth:
+            self._link_chars += len(data.strip())
+
+    def _ancestors(self, node: int):
+        while node > 0:
+            yield node
+            node = self._parents[node]
+
+    def result(self) -> Dict[str, str]:
+        """
+        Get the extracted article.
+
+        Returns:
+            Dictionary with the title, description and content (paragraphs
+            separated by blank lines); fields not found are empty strings
+        """
+        self._flush()
+        count = len(self._tags)
+        scores = [0.0] * count
+        scored = [False] * count
+        text_chars = [0] * count
+        link_chars = [0] * count
+
+        for node, text, links in self._blocks:
+            for ancestor in self._ancestors(node):
+                text_chars[ancestor] += len(text)
+                link_chars[ancestor] += links
+            if len(text) < _MIN_BLOCK_CHARS:
+                continue
+
+            score = 1 + text.count(",") + min(len(text) // 100, 3)
+            container = self._parents[node] if self._tags[node] in _PARAGRAPH_TAGS else node
+            for share, candidate in ((1.0, container), (0.5, self._parents[container])):
+                if candidate <= 0:
+                    continue
+                if not scored[candidate]:
+                    scored[candidate] = True
+                    scores[candidate] = self._weights[candidate]
+                scores[candidate] += score * share
+
+        for node in range(count):
+            if scored[node] and text_chars[node]:
+                scores[node] *= 1 - link_chars[node] / text_chars[node]
+
+        candidates = [node for node in range(count) if scored[node]]
+        content = ""
+        if candidates:
+            best = max(candidates, key=lambda node: scores[node])
+            threshold = max(10.0, scores[best] * 0.2)
+            selected = {best} | {
+                node for node in candidates
+                if self._parents[node] == self._parents[best] and scores[node] >= threshold
+            }
+            paragraphs = [
+                text for node, text, links in self._blocks
+                if links < len(text) / 2 and any(ancestor in selected for ancestor in self._ancestors(node))
+            ]
+            content = "\n\n".join(paragraphs)
+
+        title = self._meta.get("og:title") or " ".join("".join(self._title).split()) or self._h1 or ""
+        description = (
+            self._meta.get("description")
+            or self._meta.get("og:description")
+            or self._meta.get("twitter:description")
+            or ""
+        )
+        return {"title": title, "description": description, "content": content}
@@ -0,0 +1,79 @@
+from typing import Optional
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+
+from app.config import settings
+
+
+class HttpClient:
+    """
+    Application-scoped aiohttp session shared by the services.
+
+    The session is created in the FastAPI lifespan hook and reused for every
+    upstream request, so TCP/TLS connections to the dictionary API are kept
+    alive between calls instead of being re-established per lookup.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+        dns_cache_ttl: Optional[int] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        resolver: Optional[AbstractResolver] = None,
+    ):
+        self.limit = limit if limit is not None else settings.dictionary_api_pool_limit
+        self.limit_per_host = (
+            limit_per_host if limit_per_host is not None else settings.dictionary_api_pool_limit_per_host
+        )
+        self.keepalive_timeout = (
+            keepalive_timeout if keepalive_timeout is not None else settings.dictionary_api_keepalive_timeout
+        )
+        self.dns_cache_ttl = dns_cache_ttl if dns_cache_ttl is not None else settings.dictionary_api_dns_cache_ttl
+        self.timeout = timeout if timeout is not None else settings.dictionary_api_timeout
+        self.connect_timeout = (
+            connect_timeout if connect_timeout is not None else settings.dictionary_api_connect_timeout
+        )
+        self.resolver = resolver
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+            resolver=self.resolver,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout),
+        )
+
+    async def start(self) -> None:
+        """Create the underlying session and connection pool."""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+
+    async def close(self) -> None:
+        """Close the session and release pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Get the shared session.
+
+        The session is normally opened by the lifespan hook; it is created on
+        first use as well so the services keep working outside of the app
+        (scripts, the interactive shell).
+        """
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
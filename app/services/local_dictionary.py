@@ -0,0 +1,191 @@
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class LocalDictionaryIndex:
+    """
+    Read-only headword index over a dictionary dump imported with build_index().
+
+    The index is an SQLite file with one compressed row per dictionary entry
+    and a B-tree index on the lowercase headword. It is opened lazily on the
+    first lookup, read-only and memory-mapped, so only the pages touched by
+    lookups are ever loaded. Point lookups take a few microseconds, which is
+    cheap enough to run directly on the event loop.
+    """
+
+    # Upper bound of the memory-mapped region (pages are mapped on demand)
+    MMAP_SIZE = 1 << 30
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """Whether the index file exists."""
+        return self._conn is not None or os.path.exists(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+            conn.execute("PRAGMA query_only=ON")
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, word: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up a headword.
+
+        Args:
+            word: The word to look up (case-insensitive)
+
+        Returns:
+            List of entries in the dictionary API format, or None if not indexed
+        """
+        if not self.available:
+            return None
+
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT data FROM entries WHERE headword = ? ORDER BY id",
+                    (word.strip().lower(),)
+                ).fetchall()
+        except sqlite3.Error:
+            return None
+
+        if not rows:
+            return None
+        return [json.loads(zlib.decompress(row[0])) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _open_dump(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _convert_wiktionary(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Convert a Wiktionary (wiktextract/kaikki) record to the dictionary API entry format."""
+    if record.get("lang_code", "en") != "en":
+        return None
+
+    phonetics = []
+    for sound in record.get("sounds", []):
+        text = sound.get("ipa", "")
+        audio = sound.get("mp3_url") or sound.get("ogg_url") or ""
+        if text or audio:
+            phonetics.append({"text": text, "audio": audio})
+
+    definitions = []
+    for sense in record.get("senses", []):
+        glosses = sense.get("glosses") or sense.get("raw_glosses") or []
+        if not glosses:
+            continue
+        examples = sense.get("examples") or []
+        definitions.append({
+            "definition": glosses[-1],
+            "example": examples[0].get("text", "") if examples else ""
+        })
+
+    if not definitions:
+        return None
+
+    return {
+        "word": record["word"],
+        "phonetic": next((p["text"] for p in phonetics if p["text"]), ""),
+        "phonetics": phonetics,
+        "meanings": [{"partOfSpeech": record.get("pos", ""), "definitions": definitions}]
+    }
+
+
+def iter_dump_entries(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Iterate over (headword, entry) pairs of a JSON lines dictionary dump.
+
+    Each line may hold a dictionary API entry, a list of such entries (the
+    dictionaryapi.dev response shape) or a Wiktionary record as produced by
+    wiktextract. Lines that cannot be parsed are skipped.
+    """
+    with _open_dump(path) as dump:
+        for line in dump:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            for item in record if isinstance(record, list) else [record]:
+                if not isinstance(item, dict) or not item.get("word"):
+                    continue
+                entry = item if "meanings" in item else _convert_wiktionary(item)
+                if entry is not None:
+                    yield entry["word"].strip().lower(), entry
+
+
+def build_index(dump_path: str, index_path: str, batch_size: int = 5000) -> int:
+    """
+    Build a local dictionary index from a bulk dump.
+
+    The index is written to a temporary file and moved into place once
+    complete, so a running server never sees a half-built index.
+
+    Args:
+        dump_path: Path of the JSON lines dump (optionally gzip-compressed)
+        index_path: Path of the SQLite index to create
+        batch_size: Number of rows inserted per transaction
+
+    Returns:
+        Number of entries imported
+    """
+    directory = os.path.dirname(index_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = index_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(
+        "CREATE TABLE entries (id INTEGER PRIMARY KEY, headword TEXT NOT NULL, data BLOB NOT NULL)"
+    )
+
+    count = 0
+    batch = []
+    for headword, entry in iter_dump_entries(dump_path):
+        data = zlib.compress(json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        batch.append((headword, data))
+        if len(batch) >= batch_size:
+            conn.executemany("INSERT INTO entries (headword, data) VALUES (?, ?)", batch)
+            conn.commit()
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO entries (headword, data) VALUES (?, ?)", batch)
+        count += len(batch)
+
+    # Building the index after the bulk insert is much faster than maintaining it
+    conn.execute("CREATE INDEX entries_headword ON entries (headword)")
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+    os.replace(tmp_path, index_path)
+    return count
@@ -0,0 +1,267 @@
+import asyncio
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import eng_to_ipa as ipa
+from eng_to_ipa import transcribe
+
+from app.config import settings
+from app.utils.cache import MISSING, LRUCache
+
+# Words that convert to the same string as their table entry: no surrounding
+# punctuation, digits or non-ASCII letters, which eng_to_ipa treats specially
+_PLAIN_WORD = re.compile(r"[a-z](?:[a-z'\-]*[a-z])?")
+
+
+class IPATable:
+    """
+    Read-only word -> IPA table memory-mapped from a file built by build_ipa_table().
+
+    The file holds a header (magic, record count), an array of record offsets
+    and the records themselves (``word\\tipa``, UTF-8) sorted by word, so a
+    lookup is a binary search over the mapped pages without loading the file
+    into memory.
+    """
+
+    MAGIC = b"IPA1"
+    _HEADER = struct.Struct("<4sI")
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = self._HEADER.unpack_from(self._mmap, 0)
+        if magic != self.MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not an IPA table")
+        start = self._HEADER.size
+        self._offsets = memoryview(self._mmap)[start:start + 4 * (self._count + 1)].cast("I")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _record(self, i: int) -> bytes:
+        return self._mmap[self._offsets[i]:self._offsets[i + 1]]
+
+    def get(self, word: str) -> Optional[str]:
+        """
+        Get the IPA transcription of a lowercase word.
+
+        Returns:
+            The transcription, or None if the word is not in the table
+        """
+        key = word.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._record(mid)
+            record_key = record[:record.index(b"\t")]
+            if record_key < key:
+                lo = mid + 1
+            elif record_key > key:
+                hi = mid
+            else:
+                return record[len(key) + 1:].decode("utf-8")
+        return None
+
+    def close(self) -> None:
+        self._offsets.release()
+        self._mmap.close()
+
+
+def build_ipa_table(path: str) -> int:
+    """
+    Precompute the transcription of every word of the eng_to_ipa CMU dictionary.
+
+    Each word gets the same transcription ``eng_to_ipa.convert(word)``
+    returns. The table is written to a temporary file and moved into place
+    once complete.
+
+    Args:
+        path: Output file
+
+    Returns:
+        Number of words in the table
+    """
+    db_path = os.path.join(os.path.dirname(transcribe.__file__), "resources", "CMU_dict.db")
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        phonemes = defaultdict(list)
+        for word, phones in conn.execute("SELECT word, phonemes FROM dictionary ORDER BY id"):
+            phonemes[word].append(phones)
+    finally:
+        conn.close()
+
+    records = []
+    for word, phones in phonemes.items():
+        # convert() keeps the last of the sorted candidate transcriptions
+        transcription = transcribe.cmu_to_ipa([phones], stress_marking="both")[0][-1]
+        records.append(f"{word}\t{transcription}".encode("utf-8"))
+    records.sort(key=lambda record: record[:record.index(b"\t")])
+
+    offsets = []
+    position = IPATable._HEADER.size + 4 * (len(records) + 1)
+    for record in records:
+        offsets.append(position)
+        position += len(record)
+    offsets.append(position)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Every server worker may build the table at once; each writes its own
+    # file, so a table is only ever moved into place complete
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(IPATable._HEADER.pack(IPATable.MAGIC, len(records)))
+            f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+            f.writelines(records)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(records)
+
+
+class PhoneticsService:
+    """
+    English word -> IPA conversion without blocking the event loop.
+
+    Conversions are served from a memo, then from the precomputed IPATable;
+    only text the table cannot answer (unknown words, punctuation, digits)
+    goes through eng_to_ipa, in a small thread pool. The table is loaded, or
+    built if the file is missing, in the background on startup or on first
+    use; until it is ready every conversion takes the thread pool path.
+    """
+
+    def __init__(self, table_path: Optional[str] = None, memo_size: Optional[int] = None, workers: Optional[int] = None):
+        self.table_path = table_path if table_path is not None else settings.phonetics_table_path
+        self._memo = LRUCache(
+            max_size=memo_size if memo_size is not None else settings.phonetics_memo_size,
+            ttl=float("inf")
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or settings.phonetics_workers,
+            thread_name_prefix="ipa"
+        )
+        self._table: Optional[IPATable] = None
+        self._table_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start loading (or building) the IPA table in the background."""
+        if self._table_task is None and self.table_path:
+            self._table_task = asyncio.create_task(self._load_table())
+
+    async def _load_table(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            if not os.path.exists(self.table_path):
+                await loop.run_in_executor(self._executor, build_ipa_table, self.table_path)
+            self._table = await loop.run_in_executor(self._executor, IPATable, self.table_path)
+        except (OSError, ValueError, sqlite3.Error):
+            # Keep converting through eng_to_ipa
+            self._table = None
+
+    async def wait_ready(self) -> bool:
+        """Wait for the table to be loaded; returns whether it is available."""
+        self.start()
+        if self._table_task is not None:
+            await asyncio.shield(self._table_task)
+        return self._table is not None
+
+    def _convert_fast(self, text: str) -> Optional[str]:
+        """Convert text using only the memo and the table; None if that is not possible."""
+        memoized = self._memo.get(text)
+        if memoized is not MISSING:
+            return memoized
+        if self._table is None:
+            return None
+
+        transcriptions = []
+        for token in text.lower().split():
+            if not _PLAIN_WORD.fullmatch(token):
+                return None
+            transcription = self._table.get(token)
+            if transcription is None:
+                return None
+            transcriptions.append(transcription)
+
+        result = " ".join(transcriptions)
+        self._memo.set(text, result)
+        return result
+
+    @staticmethod
+    def _convert_slow(texts: List[str]) -> List[str]:
+        """Convert texts with eng_to_ipa (blocking)."""
+        results = []
+        for text in texts:
+            try:
+                results.append(ipa.convert(text))
+            except Exception:
+                results.append("")
+        return results
+
+    async def convert(self, text: str) -> str:
+        """
+        Convert English text to IPA, as ``eng_to_ipa.convert`` does.
+
+        Args:
+            text: A word or phrase
+
+        Returns:
+            The IPA transcription (unknown words are marked with '*'), or ""
+            if the conversion failed
+        """
+        return (await self.convert_many([text]))[0]
+
+    async def convert_many(self, texts: List[str]) -> List[str]:
+        """
+        Convert a list of words or phrases to IPA.
+
+        Everything the table cannot answer is converted in a single job on
+        the thread pool.
+
+        Args:
+            texts: Words or phrases to convert
+
+        Returns:
+            Transcriptions in input order
+        """
+        self.start()
+        results: List[Optional[str]] = [self._convert_fast(text) for text in texts]
+        pending: Dict[str, List[int]] = defaultdict(list)
+        for i, result in enumerate(results):
+            if result is None:
+                pending[texts[i]].append(i)
+
+        if pending:
+            loop = asyncio.get_running_loop()
+            converted = await loop.run_in_executor(self._executor, self._convert_slow, list(pending))
+            for text, result in zip(pending, converted):
+                if result:
+                    self._memo.set(text, result)
+                for i in pending[text]:
+                    results[i] = result
+        return results
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "table_size": len(self._table) if self._table is not None else 0,
+            "memo": {**self._memo.stats.as_dict(), "size": len(self._memo)}
+        }
+
+    def close(self) -> None:
+        if self._table_task is not None and not self._table_task.done():
+            self._table_task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._table is not None:
+            self._table.close()
+            self._table = None
@@ -1,26 +1,146 @@
 import json
+import asyncio
 import random
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Tuple
 
-from google import genai
 from app.config import settings
+from app.services.gemini_pool import GeminiClientPool
+from app.services.question_bank import BankKey, QuestionBank, bank_key, shuffle_options
+from app.services.quiz_engine import DistractorIndex, LocalQuizEngine
+from app.utils.cache import MISSING, LRUCache, TieredCache, content_key, create_tiered_cache, normalize_text
+from app.utils.singleflight import SingleFlight
+
+# Bump whenever the quiz prompt changes so cached quizzes are not reused
+PROMPT_VERSION = "1"
+
+
+def _word_key(word: Any) -> str:
+    return str(word).strip().lower()
+
+
+def _is_valid_question(quiz: Any) -> bool:
+    if not isinstance(quiz, dict):
+        return False
+    if not all(key in quiz for key in ['word', 'definition', 'question', 'options', 'correct_option_idx']):
+        return False
+    if not isinstance(quiz['options'], list) or len(quiz['options']) != 4:
+        return False
+    return isinstance(quiz['correct_option_idx'], int) and 0 <= quiz['correct_option_idx'] <= 3
+
+
+def _match_questions(items: List[Dict[str, Any]], quiz_data: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """
+    Assign questions to word list items.
+
+    A question goes to an unanswered item with the same word and definition
+    if there is one, otherwise to the first unanswered item with the same
+    word, so a word listed with two senses does not get one question twice.
+
+    Returns:
+        Questions by item index
+    """
+    by_sense: Dict[BankKey, List[int]] = {}
+    by_word: Dict[str, List[int]] = {}
+    for i, item in enumerate(items):
+        by_sense.setdefault(bank_key(item), []).append(i)
+        by_word.setdefault(_word_key(item["word"]), []).append(i)
+    
+    matched: Dict[int, Dict[str, Any]] = {}
+    unmatched = []
+    for quiz in quiz_data:
+        index = next((i for i in by_sense.get(bank_key(quiz), ()) if i not in matched), None)
+        if index is None:
+            unmatched.append(quiz)
+        else:
+            matched[index] = quiz
+    for quiz in unmatched:
+        index = next((i for i in by_word.get(_word_key(quiz["word"]), ()) if i not in matched), None)
+        if index is not None:
+            matched[index] = quiz
+    return matched
+
 
 class PracticeGames:
     """
     Service class for generating various vocabulary practice games and quizzes.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        gemini_pool: Optional[GeminiClientPool] = None,
+        quiz_engine: Optional[LocalQuizEngine] = None,
+        question_bank: Optional[QuestionBank] = None
+    ):
         """Initialize the PracticeGames service."""
-        pass
+        self.gemini_pool = gemini_pool or GeminiClientPool()
+        self.quiz_engine = quiz_engine or LocalQuizEngine(
+            DistractorIndex.load(settings.quiz_distractor_list_path, settings.quiz_band_size)
+        )
+        self.engine = settings.quiz_engine
+        self.llm_timeout = settings.quiz_llm_timeout
+        self.chunk_size = max(1, settings.quiz_chunk_size)
+        self.chunk_concurrency = max(1, settings.quiz_chunk_concurrency)
+        self.chunk_retries = max(0, settings.quiz_chunk_retries)
+        self._flights = SingleFlight()
+        self.cache = self._create_cache() if settings.llm_cache_enabled else None
+        self.bank = question_bank
+        if self.bank is None and settings.question_bank_enabled:
+            self.bank = QuestionBank(settings.question_bank_path, settings.question_bank_variants)
+        self.min_variants = max(1, settings.question_bank_min_variants)
+        if self.bank is not None:
+            self.min_variants = min(self.min_variants, self.bank.max_variants)
+        self._topup_semaphore = asyncio.Semaphore(settings.question_bank_topup_concurrency)
+        self._topup_tasks: Set[asyncio.Task] = set()
+        self._topping_up: Set[BankKey] = set()
+        # Words topped up recently; Gemini often repeats a question, so do not ask again on every quiz
+        self._topped_up = LRUCache(max_size=10000, ttl=settings.question_bank_topup_interval)
+
+    @staticmethod
+    def _create_cache() -> TieredCache:
+        """Create the quiz cache from the [llm_cache] settings."""
+        return create_tiered_cache(
+            memory_size=settings.llm_cache_memory_size,
+            ttl=settings.llm_cache_ttl,
+            disk_path=settings.llm_cache_disk_path,
+            table="quiz_cache",
+            disk_max_entries=settings.llm_cache_disk_max_entries
+        )
+
+    def close(self) -> None:
+        """Cancel background question bank top-ups and close the bank."""
+        for task in self._topup_tasks:
+            task.cancel()
+        if self.bank is not None:
+            self.bank.close()
 
-    async def gen_quiz_sess(self, word_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def gen_quiz_sess(
+        self, word_list: List[Dict[str, Any]], fresh: bool = False, mode: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """
         Generate multiple choice quizzes for the given word list using Gemini API.
         
+        The word list is split into chunks of ``chunk_size`` words that are
+        generated concurrently and validated question by question. Words of a
+        chunk that got no valid question are retried up to ``chunk_retries``
+        times; when Gemini does not answer a chunk within ``llm_timeout``
+        seconds, is unavailable or keeps returning invalid questions, the
+        local quiz engine fills in those words. Questions are returned in
+        input order.
+        
+        With the question bank enabled, words that already have at least
+        ``min_variants`` stored questions get one of them (options
+        reshuffled) and only the other words are sent to Gemini; every valid
+        Gemini question is added to the bank, and words served from the bank
+        with fewer than the configured number of variants are topped up in
+        the background. Without the bank, quizzes are cached by a
+        hash of the canonicalized word list, the model name and the prompt
+        version, only when every question came from Gemini.
+        
         Args:
             word_list: List of dictionaries containing word information
                       Each dict should have 'word', 'definition', and 'example' keys
+            fresh: Skip the cached quiz (or the question bank) and generate a new one
+            mode: "llm" or "local" (local quiz engine only); defaults to the configured engine
             
         Returns:
             List of quiz questions, each containing:
@@ -30,9 +150,157 @@ class PracticeGames:
             - options: List of 4 possible answers
             - correct_option_idx: Index of the correct answer (0-3)
         """
-        api_key = random.choice(settings.api_keys)
-        client = genai.Client(api_key=api_key)
+        if (mode or self.engine) == "local":
+            return self.quiz_engine.generate(word_list)
+        if self.bank is not None:
+            return await self._gen_quiz_from_bank(word_list, fresh)
+        
+        canonical = [
+            [normalize_text(str(item[field])) for field in ("word", "definition", "example")]
+            for item in word_list
+        ]
+        key = content_key("quiz", PROMPT_VERSION, self.gemini_pool.model_name, canonical)
+        if self.cache is not None and not fresh:
+            cached = await self.cache.get(key)
+            if cached is not MISSING:
+                return cached
         
+        # Identical word lists requested concurrently share one generation
+        return await self._flights.do(("quiz", key), lambda: self._generate_and_cache(word_list, key))
+    
+    async def _gen_quiz_from_bank(self, word_list: List[Dict[str, Any]], fresh: bool) -> List[Dict[str, Any]]:
+        keys = [bank_key(item) for item in word_list]
+        variants = {} if fresh else await self.bank.lookup(keys, self.min_variants)
+        # A single stored question would be asked to every student until the top-up runs
+        missing = [item for item, key in zip(word_list, keys) if len(variants.get(key, ())) < self.min_variants]
+        
+        generated: Dict[BankKey, Dict[str, Any]] = {}
+        if missing:
+            canonical = [
+                [normalize_text(str(item[field])) for field in ("word", "definition", "example")]
+                for item in missing
+            ]
+            key = content_key("quiz_bank", PROMPT_VERSION, self.gemini_pool.model_name, canonical)
+            questions, _ = await self._flights.do(("quiz_bank", key), lambda: self._generate_chunks(missing))
+            generated = {bank_key(item): quiz for item, quiz in zip(missing, questions) if quiz is not None}
+        
+        quiz_data = []
+        for item, key in zip(word_list, keys):
+            question = generated.get(key)
+            if question is None and key in variants:
+                question = shuffle_options(random.choice(variants[key]))
+            if question is not None:
+                quiz_data.append(question)
+        
+        self._schedule_topup([
+            item for item, key in zip(word_list, keys)
+            if self.min_variants <= len(variants.get(key, ())) < self.bank.max_variants
+        ])
+        return quiz_data
+    
+    def _schedule_topup(self, word_list: List[Dict[str, Any]]) -> None:
+        """Generate more question variants for the given words in the background."""
+        items = {}
+        for item in word_list:
+            key = bank_key(item)
+            if key not in self._topping_up and self._topped_up.get(key) is MISSING:
+                items[key] = item
+        if not items:
+            return
+        
+        self._topping_up.update(items)
+        for key in items:
+            self._topped_up.set(key, True)
+        task = asyncio.create_task(self._topup(list(items.values())))
+        self._topup_tasks.add(task)
+        
+        def done(task: asyncio.Task) -> None:
+            self._topup_tasks.discard(task)
+            self._topping_up.difference_update(items)
+            if not task.cancelled():
+                # Top-up is best effort; retrieve the error so it is not reported as unhandled
+                task.exception()
+        
+        task.add_done_callback(done)
+    
+    async def _topup(self, word_list: List[Dict[str, Any]]) -> None:
+        async with self._topup_semaphore:
+            await self._generate_chunks(word_list, fill=False)
+    
+    async def _generate_and_cache(self, word_list: List[Dict[str, Any]], key: str) -> List[Dict[str, Any]]:
+        questions, complete = await self._generate_chunks(word_list)
+        quiz_data = [quiz for quiz in questions if quiz is not None]
+        # A quiz patched by the local engine is not kept, so the next request asks Gemini again
+        if quiz_data and complete and self.cache is not None:
+            await self.cache.set(key, quiz_data)
+        return quiz_data
+    
+    async def _generate_chunks(
+        self, word_list: List[Dict[str, Any]], fill: bool = True
+    ) -> Tuple[List[Optional[Dict[str, Any]]], bool]:
+        """
+        Generate questions for a word list in concurrent chunks.
+        
+        Args:
+            word_list: Words to quiz
+            fill: Fill in words Gemini gave no valid question for with the local quiz engine
+        
+        Returns:
+            The question of each word in input order (None for words left
+            without one), and whether all of them came from Gemini
+        """
+        chunks = [word_list[i:i + self.chunk_size] for i in range(0, len(word_list), self.chunk_size)]
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+        
+        async def generate(chunk: List[Dict[str, Any]]) -> Tuple[List[Optional[Dict[str, Any]]], bool]:
+            async with semaphore:
+                return await self._generate_chunk(chunk, fill)
+        
+        results = await asyncio.gather(*(generate(chunk) for chunk in chunks))
+        questions = [quiz for chunk_questions, _ in results for quiz in chunk_questions]
+        return questions, all(complete for _, complete in results)
+    
+    async def _generate_chunk(
+        self, chunk: List[Dict[str, Any]], fill: bool = True
+    ) -> Tuple[List[Optional[Dict[str, Any]]], bool]:
+        """
+        Generate the questions of one chunk of the word list.
+        
+        Valid Gemini questions are added to the question bank.
+        
+        Returns:
+            The question of each word in chunk order (None for words left
+            without one), and whether all of them came from Gemini
+        """
+        questions: Dict[int, Dict[str, Any]] = {}
+        pending = list(range(len(chunk)))
+        for _ in range(self.chunk_retries + 1):
+            items = [chunk[i] for i in pending]
+            try:
+                quiz_data = await asyncio.wait_for(self._generate_quiz(items), timeout=self.llm_timeout)
+            except asyncio.TimeoutError:
+                # Retrying would double the latency of the whole quiz
+                break
+            except Exception:
+                # Any failure of the call (API error, blocked answer) counts as an empty answer
+                continue
+            matched = _match_questions(items, quiz_data)
+            for j, quiz in matched.items():
+                questions[pending[j]] = quiz
+            if self.bank is not None:
+                await self.bank.add([(bank_key(items[j]), quiz) for j, quiz in matched.items()])
+            pending = [i for i in pending if i not in questions]
+            if not pending:
+                break
+        
+        if pending and fill:
+            items = [chunk[i] for i in pending]
+            for j, quiz in _match_questions(items, self.quiz_engine.generate(items)).items():
+                questions[pending[j]] = quiz
+        
+        return [questions.get(i) for i in range(len(chunk))], not pending
+    
+    async def _generate_quiz(self, word_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         json_schema = r"""
 {
   "type": "array",
@@ -99,12 +367,10 @@ Make sure:
 - Wrong answers should be plausible words in similar category
     """
 
-        response = client.models.generate_content(
-            model=settings.gemini_model_name,
-            contents=[input_prompt]
-        )
+        response = await self.gemini_pool.generate_content(contents=[input_prompt])
 
-        raw_text = response.text.strip()
+        # The text is None when the answer was blocked or empty
+        raw_text = (response.text or "").strip()
         try:
             # Try to extract JSON if it's wrapped in code blocks
             if raw_text.startswith('```') and raw_text.endswith('```'):
@@ -116,19 +382,11 @@ Make sure:
             
             quiz_data = json.loads(content)
             
-            # Validate the structure
+            # Validate the structure; invalid questions are dropped one by one
             if not isinstance(quiz_data, list):
                 return []
             
-            for quiz in quiz_data:
-                if not all(key in quiz for key in ['word', 'definition', 'question', 'options', 'correct_option_idx']):
-                    return []
-                if len(quiz['options']) != 4:
-                    return []
-                if not 0 <= quiz['correct_option_idx'] <= 3:
-                    return []
-            
-            return quiz_data
+            return [quiz for quiz in quiz_data if _is_valid_question(quiz)]
             
         except json.JSONDecodeError:
             return []
\ No newline at end of file
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.cache import content_key, normalize_text
+
+# (lowercase word, hash of the normalized definition)
+BankKey = Tuple[str, str]
+
+
+def bank_key(item: Dict[str, Any]) -> BankKey:
+    """Get the bank key of a word list item (or of a question, which carries the same fields)."""
+    word = str(item.get("word", "")).strip().lower()
+    definition = normalize_text(str(item.get("definition", ""))).lower()
+    return word, content_key("definition", definition)[:32]
+
+
+def shuffle_options(question: Dict[str, Any], rng: Optional[random.Random] = None) -> Dict[str, Any]:
+    """Return a copy of a quiz question with its options in random order."""
+    options = list(question["options"])
+    correct = options[question["correct_option_idx"]]
+    (rng or random).shuffle(options)
+    return {**question, "options": options, "correct_option_idx": options.index(correct)}
+
+
+class QuestionBank:
+    """
+    Persistent store of validated quiz questions, keyed by (word, definition hash).
+
+    Every word sense keeps up to ``max_variants`` distinct questions (the
+    oldest are dropped first), so quizzes for words that were asked before
+    can be assembled without calling Gemini. The blocking methods run the
+    SQLite queries; the async ones run them in a worker thread and treat a
+    database error as an empty bank.
+    """
+
+    def __init__(self, path: str, max_variants: int):
+        self.path = path
+        self.max_variants = max_variants
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.served = 0
+        self.missing = 0
+        self.stored = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS questions ("
+                "word TEXT NOT NULL, definition_hash TEXT NOT NULL, question_hash TEXT NOT NULL, "
+                "question TEXT NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (word, definition_hash, question_hash))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: List[BankKey]) -> Dict[BankKey, List[Dict[str, Any]]]:
+        """
+        Get the stored questions of several word senses (blocking).
+
+        Returns:
+            Questions per key, newest first; keys without questions are left out
+        """
+        words = sorted({word for word, _ in keys})
+        wanted = set(keys)
+        variants: Dict[BankKey, List[Dict[str, Any]]] = {}
+        if not words:
+            return variants
+
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT word, definition_hash, question FROM questions "
+                f"WHERE word IN ({','.join('?' * len(words))}) ORDER BY created_at DESC",
+                words
+            ).fetchall()
+        for word, definition_hash, question in rows:
+            if (word, definition_hash) in wanted:
+                variants.setdefault((word, definition_hash), []).append(json.loads(question))
+        return variants
+
+    def add_many(self, questions: List[Tuple[BankKey, Dict[str, Any]]]) -> int:
+        """
+        Store validated questions (blocking); a question already in the bank is ignored.
+
+        Args:
+            questions: (key of the quizzed word list item, question) pairs
+
+        Returns:
+            Number of new questions
+        """
+        now = time.time()
+        added = 0
+        with self._lock:
+            conn = self._connect()
+            for (word, definition_hash), question in questions:
+                question_hash = content_key(
+                    normalize_text(str(question["question"])).lower(),
+                    sorted(normalize_text(str(option)).lower() for option in question["options"])
+                )
+                added += conn.execute(
+                    "INSERT OR IGNORE INTO questions (word, definition_hash, question_hash, question, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (word, definition_hash, question_hash, json.dumps(question, ensure_ascii=False), now)
+                ).rowcount
+            for word, definition_hash in {key for key, _ in questions}:
+                conn.execute(
+                    "DELETE FROM questions WHERE word = ? AND definition_hash = ? AND question_hash NOT IN ("
+                    "SELECT question_hash FROM questions WHERE word = ? AND definition_hash = ? "
+                    "ORDER BY created_at DESC LIMIT ?)",
+                    (word, definition_hash, word, definition_hash, self.max_variants)
+                )
+            conn.commit()
+        self.stored += added
+        return added
+
+    async def lookup(self, keys: List[BankKey], min_variants: int = 1) -> Dict[BankKey, List[Dict[str, Any]]]:
+        """
+        Get the stored questions of several word senses without blocking the event loop.
+
+        Keys with fewer than ``min_variants`` questions are returned as well,
+        but count as missing in the stats.
+        """
+        try:
+            variants = await asyncio.to_thread(self.get_many, keys)
+        except sqlite3.Error:
+            variants = {}
+        found = sum(1 for key in keys if len(variants.get(key, ())) >= min_variants)
+        self.served += found
+        self.missing += len(keys) - found
+        return variants
+
+    async def add(self, questions: List[Tuple[BankKey, Dict[str, Any]]]) -> None:
+        """Store validated questions without blocking the event loop."""
+        if not questions:
+            return
+        try:
+            await asyncio.to_thread(self.add_many, questions)
+        except (sqlite3.Error, TypeError, ValueError):
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"served": self.served, "missing": self.missing, "stored": self.stored}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,225 @@
+import os
+import random
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.utils.cache import content_key, normalize_text
+from app.utils.text_utils import normalize_lemma
+
+_POS_ALIASES = {
+    "noun": "NOUN", "n": "NOUN",
+    "verb": "VERB", "v": "VERB",
+    "adjective": "ADJ", "adj": "ADJ",
+    "adverb": "ADV", "adv": "ADV",
+}
+
+
+def normalize_pos(part_of_speech: Any) -> Optional[str]:
+    """Map a free-form part of speech ("Noun", "adj.", "transitive verb") to NOUN/VERB/ADJ/ADV."""
+    words = str(part_of_speech or "").lower().replace(".", " ").split()
+    for word in reversed(words):
+        if word in _POS_ALIASES:
+            return _POS_ALIASES[word]
+    return None
+
+
+class DistractorIndex:
+    """
+    Candidate wrong answers grouped by part of speech and frequency band.
+
+    Words are kept in frequency order and split into bands of ``band_size``
+    words, so a distractor can be drawn from the same part of speech and a
+    similar frequency as the target word, which makes it plausible without
+    being a synonym search.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Sequence[str]]], band_size: int = 1000):
+        """
+        Build the index.
+
+        Args:
+            entries: (word, parts of speech) pairs, most frequent word first
+            band_size: Number of consecutive words per frequency band
+        """
+        self.band_size = band_size
+        self._positions: Dict[str, int] = {}
+        self._parts_of_speech: Dict[str, Tuple[str, ...]] = {}
+        self._groups: Dict[str, List[List[str]]] = defaultdict(list)
+        for position, (word, parts_of_speech) in enumerate(entries):
+            self._positions[word] = position
+            self._parts_of_speech[word] = tuple(parts_of_speech)
+            band = position // band_size
+            for part_of_speech in parts_of_speech:
+                bands = self._groups[part_of_speech]
+                while len(bands) <= band:
+                    bands.append([])
+                bands[band].append(word)
+
+    @classmethod
+    def load(cls, path: str, band_size: int = 1000) -> Optional["DistractorIndex"]:
+        """
+        Load the index from a tab-separated file (word, comma-separated parts of speech).
+
+        Lines starting with '#' are ignored.
+
+        Returns:
+            The index, or None if the file does not exist
+        """
+        if not path or not os.path.exists(path):
+            return None
+        entries = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                word, _, parts_of_speech = line.rstrip("\n").partition("\t")
+                entries.append((word, parts_of_speech.split(",")))
+        return cls(entries, band_size)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def part_of_speech(self, word: str) -> Optional[str]:
+        """Get the first listed part of speech of a word."""
+        parts_of_speech = self._parts_of_speech.get(word.lower())
+        return parts_of_speech[0] if parts_of_speech else None
+
+    def pick(self, word: str, part_of_speech: str, count: int, rng: random.Random, exclude: Set[str]) -> List[str]:
+        """
+        Pick distractors for a word.
+
+        Candidates come from the word's band first, then from the neighbouring
+        bands (more frequent first). Words unknown to the index count as rarer
+        than every listed word.
+
+        Args:
+            word: The target word
+            part_of_speech: Normalized part of speech of the target
+            count: Number of distractors wanted
+            rng: Random generator (seeded for reproducible quizzes)
+            exclude: Words that must not be picked (lowercase)
+
+        Returns:
+            Up to ``count`` distractors
+        """
+        bands = self._groups.get(part_of_speech) or self._groups.get("NOUN") or []
+        if not bands:
+            return []
+
+        target = word.lower()
+        position = self._positions.get(target, len(self._positions))
+        target_band = min(position // self.band_size, len(bands) - 1)
+
+        chosen: List[str] = []
+        for offset in range(2 * len(bands)):
+            band = target_band - (offset + 1) // 2 if offset % 2 else target_band + offset // 2
+            if not 0 <= band < len(bands) or not bands[band]:
+                continue
+            candidates = bands[band]
+            for candidate in rng.sample(candidates, min(len(candidates), 4 * count)):
+                if candidate not in exclude and candidate not in chosen and _distinct(candidate, target):
+                    chosen.append(candidate)
+                    if len(chosen) == count:
+                        return chosen
+        return chosen
+
+
+def _distinct(candidate: str, target: str) -> bool:
+    """Whether a candidate is clearly a different word (not a form or close relative of the target)."""
+    if normalize_lemma(candidate) == normalize_lemma(target):
+        return False
+    prefix = min(len(candidate), len(target), 4)
+    return candidate[:prefix] != target[:prefix]
+
+
+class LocalQuizEngine:
+    """
+    Deterministic multiple choice quiz generator that needs no LLM.
+
+    Each word gets either a definition question or, when its example
+    contains the word, a fill-in-the-blank question on the example. Wrong
+    options are other quiz words with the same part of speech (at most one)
+    and words from the DistractorIndex. The same word list always gives the
+    same quiz.
+    """
+
+    OPTIONS = 4
+
+    def __init__(self, index: Optional[DistractorIndex] = None):
+        self.index = index
+
+    def generate(self, word_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generate a quiz for the given word list.
+
+        Args:
+            word_list: List of dictionaries with 'word', 'definition' and
+                       'example' keys (and optionally 'partOfSpeech')
+
+        Returns:
+            List of quiz questions in the same schema as the Gemini quiz;
+            words without a definition or usable example, or for which not
+            enough distractors were found, are left out
+        """
+        canonical = [
+            [normalize_text(str(item.get(field, ""))) for field in ("word", "definition", "example")]
+            for item in word_list
+        ]
+        rng = random.Random(int(content_key("local_quiz", canonical)[:16], 16))
+
+        items = []
+        for item in word_list:
+            word = str(item.get("word", "")).strip()
+            if not word:
+                continue
+            part_of_speech = normalize_pos(item.get("partOfSpeech"))
+            if part_of_speech is None and self.index is not None:
+                part_of_speech = self.index.part_of_speech(word)
+            items.append((item, word, part_of_speech or "NOUN"))
+
+        quiz_words = {word.lower() for _, word, _ in items}
+        quiz = []
+        for item, word, part_of_speech in items:
+            question = self._question(word, str(item.get("definition", "")), str(item.get("example", "")), rng)
+            if question is None:
+                continue
+
+            peers = [
+                other for _, other, other_pos in items
+                if other_pos == part_of_speech and _distinct(other.lower(), word.lower())
+            ]
+            distractors = [rng.choice(peers)] if peers else []
+            if self.index is not None:
+                distractors += self.index.pick(
+                    word, part_of_speech, self.OPTIONS - 1 - len(distractors), rng,
+                    exclude=quiz_words | {distractor.lower() for distractor in distractors}
+                )
+            if len(distractors) < self.OPTIONS - 1:
+                continue
+
+            options = distractors + [word]
+            rng.shuffle(options)
+            quiz.append({
+                "word": word,
+                "definition": item.get("definition", ""),
+                "question": question,
+                "options": options,
+                "correct_option_idx": options.index(word)
+            })
+        return quiz
+
+    @staticmethod
+    def _question(word: str, definition: str, example: str, rng: random.Random) -> Optional[str]:
+        """Build a definition or fill-in-the-blank question that does not reveal the word."""
+        target = re.compile(rf"\b{re.escape(word)}\w*", re.IGNORECASE)
+        definition = " ".join(definition.split())
+        example = " ".join(example.split())
+
+        cloze = target.subn("_____", example)
+        use_cloze = cloze[1] > 0 and (not definition or rng.random() < 0.5)
+        if use_cloze:
+            return f'Which word best completes the sentence: "{cloze[0]}"?'
+        if definition:
+            return f'Which word means: "{target.sub("_____", definition).rstrip(".")}"?'
+        return None
@@ -1,12 +1,27 @@
 import re
 import json
-import random
-from typing import List, Dict, Any
+import asyncio
+from contextlib import aclosing
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Dict, Any, Optional, Tuple
+from urllib.parse import urldefrag
 
-import aiohttp
-import eng_to_ipa as ipa
-from google import genai
 from app.config import settings
+from app.services.dictionary import Dictionary
+from app.services.gemini_pool import GeminiClientPool
+from app.services.web_fetcher import WebFetcher
+from app.services.word_frequency import WordFrequencyIndex
+from app.utils.cache import MISSING, TieredCache, content_key, create_tiered_cache, normalize_text
+from app.utils.json_stream import JsonArrayStream
+from app.utils.singleflight import SingleFlight
+from app.utils.text_utils import (
+    MarkdownCleaner, chunk_text, normalize_lemma, preprocess_markdown, split_sentences, tokenize_words
+)
+
+# Bump whenever the extraction prompt changes so cached results are not reused
+PROMPT_VERSION = "4"
+
+# Keys every extracted vocabulary entry must have
+VOCAB_FIELDS = ("word", "partOfSpeech", "definition", "example")
 
 
 class VocabularyManager:
@@ -15,23 +30,241 @@ class VocabularyManager:
     Extracts new words to learn from text using Gemini API.
     """
     
-    def __init__(self):
-        self.dictionary_api_url = settings.dictionary_api_url
-        self.dictionary_api_timeout = settings.dictionary_api_timeout
+    def __init__(
+        self,
+        dictionary: Optional[Dictionary] = None,
+        gemini_pool: Optional[GeminiClientPool] = None,
+        frequency_index: Optional[WordFrequencyIndex] = None,
+        web_fetcher: Optional[WebFetcher] = None
+    ):
+        self.dictionary = dictionary or Dictionary()
+        # Not the dictionary pool: page fetches need the pool that refuses internal addresses
+        self.web_fetcher = web_fetcher or WebFetcher()
+        self.phonetics = self.dictionary.phonetics
+        self.gemini_pool = gemini_pool or GeminiClientPool()
+        self.frequency_index = frequency_index or WordFrequencyIndex.load(settings.vocab_frequency_list_path)
+        self.prefilter = settings.vocab_prefilter and self.frequency_index is not None
+        self.common_rank_cutoff = settings.vocab_common_rank_cutoff
+        self.max_candidates = settings.vocab_max_candidates
+        self.extraction_mode = settings.vocab_extraction_mode
+        self.phonetic_concurrency = settings.phonetic_concurrency
+        self.phonetic_timeout = settings.phonetic_timeout
+        self.chunk_size = settings.vocab_chunk_size
+        self.chunk_parallelism = settings.vocab_chunk_parallelism
+        self.max_words = settings.vocab_max_words
+        self.url_cache_ttl = settings.vocab_url_cache_ttl
+        self._flights = SingleFlight()
+        self.cache = self._create_cache() if settings.llm_cache_enabled else None
     
-    async def get_vocab_text(self, text: str) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _create_cache() -> TieredCache:
+        """Create the extraction result cache from the [llm_cache] settings."""
+        return create_tiered_cache(
+            memory_size=settings.llm_cache_memory_size,
+            ttl=settings.llm_cache_ttl,
+            disk_path=settings.llm_cache_disk_path,
+            table="vocab_cache",
+            disk_max_entries=settings.llm_cache_disk_max_entries
+        )
+    
+    async def get_vocab_text(self, text: str, fresh: bool = False, mode: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Extract new words to learn from text.
         
+        Results are cached by a hash of the normalized text, the model name and
+        the prompt version.
+        
         Args:
             text: The text to extract vocabulary from
+            fresh: Skip the cached result and generate a new one
+            mode: "llm" (Gemini) or "local" (frequency ranking and dictionary
+                  definitions, no LLM); defaults to the configured mode
+            
+        Returns:
+            List of vocabulary words with definitions and examples
+        """
+        if (mode or self.extraction_mode) == "local":
+            return await self.get_vocab_text_local(text)
+        
+        key = self._cache_key(text)
+        if self.cache is not None and not fresh:
+            cached = await self.cache.get(key)
+            if cached is not MISSING:
+                return cached
+        
+        # Identical texts submitted concurrently share one Gemini call
+        return await self._flights.do(("vocab", key), lambda: self._extract_and_cache(text, key))
+    
+    async def get_vocab_url(self, url: str, fresh: bool = False, mode: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Extract new words to learn from a web page.
+        
+        The page is fetched with the WebFetcher and its content cleaned with
+        MarkdownCleaner in a worker thread. In "llm" mode each chunk (with
+        its own pre-filtered candidates) is sent to Gemini as soon as it is
+        cleaned, while the rest of the page is still being processed.
+        Results are cached by URL for ``url_cache_ttl`` seconds.
+        
+        Args:
+            url: The URL of the page
+            fresh: Skip cached results (page and vocabulary)
+            mode: "llm" or "local"; defaults to the configured mode
             
         Returns:
             List of vocabulary words with definitions and examples
         """
-        api_key = random.choice(settings.api_keys)
-        client = genai.Client(api_key=api_key)
+        mode = mode or self.extraction_mode
+        prefilter = [self.common_rank_cutoff, self.max_candidates] if self.prefilter else None
+        key = content_key("vocab_url", PROMPT_VERSION, self.gemini_pool.model_name, prefilter, mode, urldefrag(url)[0])
+        if self.cache is not None and not fresh:
+            cached = await self.cache.get(key)
+            if cached is not MISSING:
+                return cached
+        
+        return await self._flights.do(
+            ("vocab_url", key), lambda: self._extract_url_and_cache(url, key, fresh, mode)
+        )
+    
+    async def _extract_url_and_cache(self, url: str, key: str, fresh: bool, mode: str) -> List[Dict[str, Any]]:
+        page = await self.web_fetcher.fetch_content(url, fresh=fresh)
+        content = page.get("content") or ""
+        
+        if mode == "local":
+            # The whole text is needed to rank candidates, so clean it in one go
+            text = await asyncio.to_thread(preprocess_markdown, content)
+            vocab_list = await self.get_vocab_text(text, fresh=fresh, mode=mode) if text else []
+        else:
+            vocab_list = await self._extract_chunked(self._clean_chunks(content))
+            if vocab_list:
+                vocab_list = await self._add_phonetic_info(vocab_list)
+        
+        if vocab_list and self.cache is not None:
+            await self.cache.set(key, vocab_list, ttl=self.url_cache_ttl)
+        return vocab_list
+    
+    async def _clean_chunks(self, content: str, piece_size: int = 65536) -> AsyncIterator[str]:
+        """
+        Clean page content and yield it in sentence-aligned chunks as soon as each is complete.
+        
+        Cleaning runs in a worker thread, piece by piece, so chunks already
+        yielded can be processed in the meantime.
+        """
+        cleaner = MarkdownCleaner()
+        pending = ""
+        for start in range(0, len(content), piece_size):
+            pending += await asyncio.to_thread(cleaner.feed, content[start:start + piece_size])
+            if len(pending) > self.chunk_size:
+                # The last chunk may end mid-sentence; keep it until more text arrives
+                *complete, pending = chunk_text(pending, self.chunk_size)
+                for chunk in complete:
+                    yield chunk
+        
+        pending += cleaner.finish()
+        if pending:
+            for chunk in chunk_text(pending, self.chunk_size):
+                yield chunk
+    
+    async def stream_vocab_text(
+        self, text: str, fresh: bool = False, mode: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Extract new words to learn from text, yielding each word as soon as it is ready.
+        
+        The model answer is streamed and parsed incrementally; every complete
+        array element is enriched with phonetic information right away and
+        yielded once its enrichment finishes, so words may come out of order.
+        The complete list is stored in the same cache as get_vocab_text().
+        Texts that need the chunked pipeline (longer than ``chunk_size``) are
+        extracted with get_vocab_text() and yielded once merged. In "local"
+        mode every text goes through get_vocab_text_local(), without an LLM
+        call, whatever its length.
+        
+        Args:
+            text: The text to extract vocabulary from
+            fresh: Skip the cached result and generate a new one
+            mode: "llm" or "local"; defaults to the configured mode
+            
+        Yields:
+            Vocabulary words with phonetic information, definitions and examples
+        """
+        if (mode or self.extraction_mode) == "local":
+            for entry in await self.get_vocab_text_local(text):
+                yield entry
+            return
+        
+        key = self._cache_key(text)
+        if self.cache is not None and not fresh:
+            cached = await self.cache.get(key)
+            if cached is not MISSING:
+                for entry in cached:
+                    yield entry
+                return
+        
+        if self._needs_chunking(text):
+            for entry in await self.get_vocab_text(text, fresh=fresh):
+                yield entry
+            return
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.phonetic_concurrency)
+        results: List[Optional[Dict[str, Any]]] = []
+        enrich_tasks: List[asyncio.Task] = []
+        finished = object()
+        
+        async def enrich(index: int, word_entry: Dict[str, Any]) -> None:
+            results[index] = await self._add_entry_phonetic(word_entry, semaphore)
+            queue.put_nowait(results[index])
+        
+        async def produce() -> None:
+            parser = JsonArrayStream()
+            chunks = self.gemini_pool.generate_content_stream(contents=[self._build_prompt(text)])
+            async with aclosing(chunks):
+                async for chunk in chunks:
+                    for word_entry in parser.feed(chunk):
+                        if isinstance(word_entry, dict) and all(field in word_entry for field in VOCAB_FIELDS):
+                            results.append(None)
+                            enrich_tasks.append(asyncio.ensure_future(enrich(len(results) - 1, word_entry)))
+                    if parser.finished:
+                        break
+            await asyncio.gather(*enrich_tasks)
+        
+        producer = asyncio.ensure_future(produce())
+        producer.add_done_callback(lambda _: queue.put_nowait(finished))
+        try:
+            while True:
+                entry = await queue.get()
+                if entry is finished:
+                    break
+                yield entry
+            # Re-raise model/stream errors once the words that did arrive are out
+            producer.result()
+        finally:
+            producer.cancel()
+            for task in enrich_tasks:
+                task.cancel()
+        
+        if results and self.cache is not None:
+            await self.cache.set(key, results)
+    
+    def _cache_key(self, text: str) -> str:
+        # The pre-filter settings change the prompt, so they are part of the key
+        prefilter = [self.common_rank_cutoff, self.max_candidates] if self.prefilter else None
+        return content_key("vocab", PROMPT_VERSION, self.gemini_pool.model_name, prefilter, normalize_text(text))
+    
+    async def _extract_and_cache(self, text: str, key: str) -> List[Dict[str, Any]]:
+        vocab_list = await self._extract_vocab(text)
+        # Empty results are usually malformed model output; do not keep them
+        if vocab_list and self.cache is not None:
+            await self.cache.set(key, vocab_list)
+        return vocab_list
+    
+    def _build_prompt(self, text: str) -> str:
+        """
+        Build the extraction prompt.
         
+        With the frequency pre-filter only the uncommon candidate words and
+        their context sentences are sent instead of the full text.
+        """
         json_schema = r"""
 {
   "type": "array",
@@ -55,6 +288,26 @@ class VocabularyManager:
   }
 }
 """
+        candidates = self._select_candidates(text) if self.prefilter else []
+        if candidates:
+            candidates_info = [{"word": c["word"], "context": c["context"]} for c in candidates]
+            return f"""
+You are an expert language teacher. Below are candidate words taken from a text, each with a sentence of the text it appears in. Your task is to pick up to 10 of them that would be valuable for a language learner to study.
+
+Select words that are:
+1. Relatively uncommon or advanced
+2. Useful in various contexts
+3. Worth adding to one's vocabulary
+
+Your response must be valid JSON that strictly adheres to the JSON schema defined below, without any additional content or commentary.
+{json_schema}
+
+Return words in their singular form. Give the definition matching the meaning used in the context sentence. Do not select more than 10 words.
+
+Candidates: {json.dumps(candidates_info, ensure_ascii=False)}
+Output:
+"""
+        
         input_prompt = f"""
 You are an expert language teacher. Your task is to identify up to 10 words from the provided text that would be valuable for a language learner to study.
 
@@ -71,9 +324,128 @@ Return words in their singular form. Do not select more than 10 words, even if t
 Input text: "{text}"
 Output:
 """
-        response = client.models.generate_content(
-                    model=settings.gemini_model_name,
-                    contents=[input_prompt])
+        return input_prompt
+    
+    def _select_candidates(self, text: str, listed_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        Pick the uncommon words of a text using the frequency index.
+        
+        Words ranked within ``common_rank_cutoff`` are dropped, as are short
+        words and capitalized words inside a sentence (likely proper nouns).
+        The ``max_candidates`` rarest of the remaining words are kept, words
+        missing from the frequency list counting as the rarest; words of
+        equal rank are kept in the order they first appear in the text.
+        
+        Args:
+            text: The text to analyze
+            listed_only: Also drop words missing from the frequency list
+                         (names, typos), which rarely have a dictionary entry
+            
+        Returns:
+            Candidates in document order, each with the word, the first
+            sentence it appears in and its frequency rank (None if unlisted)
+        """
+        seen = set()
+        candidates = []
+        for sentence in split_sentences(text):
+            for position, token in enumerate(tokenize_words(sentence)):
+                if len(token) < 4 or (position > 0 and token[0].isupper()):
+                    continue
+                word = token.lower()
+                lemma = normalize_lemma(word)
+                if lemma in seen:
+                    continue
+                seen.add(lemma)
+                
+                ranks = [r for r in (self.frequency_index.rank(word), self.frequency_index.rank(lemma)) if r]
+                rank = min(ranks) if ranks else None
+                if (rank is None and listed_only) or (rank is not None and rank <= self.common_rank_cutoff):
+                    continue
+                candidates.append({
+                    "word": lemma if self.frequency_index.rank(lemma) else word,
+                    "context": sentence[:300],
+                    "rank": rank,
+                    "order": len(candidates)
+                })
+        
+        unlisted = len(self.frequency_index) + 1
+        candidates.sort(key=lambda c: (-(c["rank"] or unlisted), c["order"]))
+        selected = sorted(candidates[:self.max_candidates], key=lambda c: c["order"])
+        return [{"word": c["word"], "context": c["context"], "rank": c["rank"]} for c in selected]
+    
+    async def get_vocab_text_local(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Extract vocabulary without an LLM.
+        
+        Candidates from the frequency pre-filter (words missing from the
+        frequency list excluded) are ranked, most frequent uncommon words
+        first, and looked up in the dictionary backend in that order, at most
+        ``phonetic_concurrency`` at a time. Lookups stop once ``max_words``
+        words with a definition are found. When the dictionary has no
+        example, the sentence from the text is used.
+        
+        Args:
+            text: The text to extract vocabulary from
+            
+        Returns:
+            List of vocabulary words in the same format as get_vocab_text()
+        """
+        if self.frequency_index is None:
+            return []
+        
+        # sorted() is stable, so words of equal rank stay in document order
+        candidates = iter(enumerate(sorted(self._select_candidates(text, listed_only=True), key=lambda c: c["rank"])))
+        found: Dict[int, Dict[str, Any]] = {}
+        
+        async def lookup(candidate: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            entries = await self.dictionary.fetch_entries(candidate["word"])
+            for entry in entries or []:
+                for meaning in entry.get("meanings", []):
+                    for definition in meaning.get("definitions", []):
+                        if definition.get("definition"):
+                            return {
+                                "word": candidate["word"],
+                                "partOfSpeech": meaning.get("partOfSpeech", ""),
+                                "definition": definition["definition"],
+                                "example": definition.get("example") or candidate["context"]
+                            }
+            return None
+        
+        async def worker() -> None:
+            # Workers share the iterator, so candidates are started in rank order
+            for index, candidate in candidates:
+                if len(found) >= self.max_words:
+                    return
+                entry = await lookup(candidate)
+                if entry is not None:
+                    found[index] = entry
+        
+        await asyncio.gather(*(worker() for _ in range(self.phonetic_concurrency)))
+        # Lookups still running when the limit was reached may add a few extra hits; keep the best ranked
+        vocab_list = [found[index] for index in sorted(found)][:self.max_words]
+        return await self._add_phonetic_info(vocab_list)
+    
+    def _needs_chunking(self, text: str) -> bool:
+        # With the pre-filter each chunk gets its own candidates, so long texts are not cut to max_candidates
+        return len(text) > self.chunk_size
+    
+    async def _extract_vocab(self, text: str) -> List[Dict[str, Any]]:
+        chunks = chunk_text(text, self.chunk_size) if self._needs_chunking(text) else [text]
+        if len(chunks) > 1:
+            vocab_list = await self._extract_chunked(chunks)
+        else:
+            vocab_list = await self._generate_vocab_list(text)
+        
+        if not vocab_list:
+            return []
+        
+        # Add phonetic information to each word
+        enhanced_vocab_list = await self._add_phonetic_info(vocab_list)
+        return enhanced_vocab_list
+    
+    async def _generate_vocab_list(self, text: str) -> List[Dict[str, Any]]:
+        """Ask Gemini for vocabulary in the text and parse its answer (without phonetics)."""
+        response = await self.gemini_pool.generate_content(contents=[self._build_prompt(text)])
         
         raw_text = response.text.strip()
         pattern = r'```json\s*(.+?)\s*```'
@@ -82,86 +454,167 @@ Output:
         
         try:
             vocab_list = json.loads(content)
-            if not isinstance(vocab_list, list):
-                return []
-            
-            # Add phonetic information to each word
-            enhanced_vocab_list = await self._add_phonetic_info(vocab_list)
-            return enhanced_vocab_list
         except json.JSONDecodeError:
             return []
+        return vocab_list if isinstance(vocab_list, list) else []
+    
+    async def _extract_chunked(self, chunks: Iterable[str] | AsyncIterable[str]) -> List[Dict[str, Any]]:
+        """
+        Extract vocabulary from a long text split into chunks.
+        
+        Chunks are sent to Gemini concurrently (at most ``chunk_parallelism``
+        at a time), each as soon as it is available; the candidates are then
+        merged and ranked.
+        
+        Args:
+            chunks: Sentence-aligned chunks of the text, possibly produced asynchronously
+            
+        Returns:
+            Top ``max_words`` vocabulary entries
+        """
+        semaphore = asyncio.Semaphore(self.chunk_parallelism)
+        
+        async def extract(chunk: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self._generate_vocab_list(chunk)
+        
+        tasks = []
+        try:
+            if isinstance(chunks, AsyncIterable):
+                async for chunk in chunks:
+                    tasks.append(asyncio.ensure_future(extract(chunk)))
+            else:
+                tasks = [asyncio.ensure_future(extract(chunk)) for chunk in chunks]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        if not results:
+            return []
+        candidate_lists = [result for result in results if not isinstance(result, BaseException)]
+        if not candidate_lists:
+            # Every chunk failed; surface the first error
+            raise results[0]
+        return self._merge_candidates(candidate_lists)
+    
+    def _merge_candidates(self, candidate_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Merge per-chunk candidates, deduplicating by lemma and keeping the top ``max_words``.
+        
+        Words picked in more chunks rank higher; ties keep document order.
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        for chunk_index, candidates in enumerate(candidate_lists):
+            for position, entry in enumerate(candidates):
+                if not isinstance(entry, dict) or not all(field in entry for field in VOCAB_FIELDS):
+                    continue
+                lemma = normalize_lemma(str(entry["word"]))
+                if not lemma:
+                    continue
+                if lemma in merged:
+                    merged[lemma]["chunks"] += 1
+                else:
+                    merged[lemma] = {"entry": entry, "chunks": 1, "order": (chunk_index, position)}
+        
+        ranked = sorted(merged.values(), key=lambda item: (-item["chunks"], item["order"]))
+        return [item["entry"] for item in ranked[:self.max_words]]
     
     async def _add_phonetic_info(self, vocab_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Add phonetic information to each word in the vocabulary list.
         
+        Words are enriched concurrently (bounded by ``phonetic_concurrency``);
+        a word whose lookup does not finish within ``phonetic_timeout`` seconds
+        falls back to IPA conversion without holding up the rest of the batch.
+        Fallback conversions of the whole list are done in one batch.
+        
         Args:
             vocab_list: List of vocabulary words with definitions and examples
             
         Returns:
-            Enhanced list with phonetic information added
+            Enhanced list with phonetic information added, in input order
         """
-        enhanced_list = []
+        semaphore = asyncio.Semaphore(self.phonetic_concurrency)
+        enhanced = list(await asyncio.gather(
+            *(self._add_entry_phonetic(word_entry, semaphore, convert_fallback=False) for word_entry in vocab_list)
+        ))
         
-        for word_entry in vocab_list:
-            word = word_entry.get("word", "")
-            if not word:
-                enhanced_list.append(word_entry)
-                continue
-            
-            # Initialize phonetic data
-            phonetic_text = ""
-            audio_url = ""
+        missing = [entry for entry in enhanced if "phonetic" in entry and not entry["phonetic"]["text"]]
+        if missing:
+            converted = await self.phonetics.convert_many([entry["word"] for entry in missing])
+            for entry, phonetic_text in zip(missing, converted):
+                entry["phonetic"]["text"] = phonetic_text
+        return enhanced
+    
+    async def _add_entry_phonetic(
+        self, word_entry: Dict[str, Any], semaphore: asyncio.Semaphore, convert_fallback: bool = True
+    ) -> Dict[str, Any]:
+        """Add phonetic information to a single vocabulary entry.
+        
+        With ``convert_fallback`` off, a word without dictionary phonetics is
+        left with empty text for the caller to convert.
+        """
+        word = word_entry.get("word", "")
+        if not word:
+            return word_entry
+        
+        # Try to get phonetic data from the dictionary (cached, coalesced)
+        phonetic_text, audio_url = await self._fetch_phonetic(word, semaphore)
+        
+        # If no phonetic text found, convert the word to IPA as fallback
+        if not phonetic_text and convert_fallback:
+            phonetic_text = await self.phonetics.convert(word)
+        
+        # Add phonetic information to the word entry
+        # Create new word entry with reordered keys
+        return {
+            "word": word_entry["word"],
+            "phonetic": {
+                "text": phonetic_text,
+                "audio": audio_url
+            },
+            "partOfSpeech": word_entry["partOfSpeech"],
+            "definition": word_entry["definition"],
+            "example": word_entry["example"]
+        }
+    
+    async def _fetch_phonetic(self, word: str, semaphore: asyncio.Semaphore) -> Tuple[str, str]:
+        """Get phonetic text and audio URL for a word from the dictionary.
+        
+        The lookup gets ``phonetic_timeout`` seconds once it holds the
+        semaphore, so time spent waiting for a slot does not count.
+        
+        Args:
+            word: The word to look up
+            semaphore: Bounds the number of concurrent lookups of the batch
             
-            # Try to get phonetic data from dictionary API
+        Returns:
+            Tuple of (phonetic text, audio URL), empty strings if unavailable
+        """
+        phonetic_text = ""
+        audio_url = ""
+        
+        async with semaphore:
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        self.dictionary_api_url.format(word=word),
-                        timeout=self.dictionary_api_timeout
-                    ) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            
-                            # Extract phonetic information from API response
-                            if data and isinstance(data, list):
-                                first_entry = data[0]
-                                # Get phonetic text from top-level phonetic field if available
-                                if "phonetic" in first_entry and first_entry["phonetic"]:
-                                    phonetic_text = first_entry["phonetic"]
-                                
-                                # Look for audio URL in phonetics array
-                                if "phonetics" in first_entry and first_entry["phonetics"]:
-                                    for phonetic in first_entry["phonetics"]:
-                                        # Prioritize entries that have both text and audio
-                                        if "audio" in phonetic and phonetic["audio"]:
-                                            audio_url = phonetic["audio"]
-                                            if "text" in phonetic and phonetic["text"]:
-                                                phonetic_text = phonetic["text"]
-                                            break
-            except Exception:
-                # If API request fails, continue with fallback
-                pass
-            
-            # If no phonetic text found, use eng_to_ipa as fallback
-            if not phonetic_text:
-                try:
-                    phonetic_text = ipa.convert(word)
-                except Exception:
-                    phonetic_text = ""
+                data = await asyncio.wait_for(self.dictionary.fetch_entries(word), timeout=self.phonetic_timeout)
+            except asyncio.TimeoutError:
+                data = None
+        
+        # Extract phonetic information from the dictionary entries
+        if data and isinstance(data, list):
+            first_entry = data[0]
+            # Get phonetic text from top-level phonetic field if available
+            if "phonetic" in first_entry and first_entry["phonetic"]:
+                phonetic_text = first_entry["phonetic"]
             
-            # Add phonetic information to the word entry
-            # Create new word entry with reordered keys
-            new_entry = {
-                "word": word_entry["word"],
-                "phonetic": {
-                    "text": phonetic_text,
-                    "audio": audio_url
-                },
-                "partOfSpeech": word_entry["partOfSpeech"],
-                "definition": word_entry["definition"],
-                "example": word_entry["example"]
-            }
-
-            enhanced_list.append(new_entry)
+            # Look for audio URL in phonetics array
+            if "phonetics" in first_entry and first_entry["phonetics"]:
+                for phonetic in first_entry["phonetics"]:
+                    # Prioritize entries that have both text and audio
+                    if "audio" in phonetic and phonetic["audio"]:
+                        audio_url = phonetic["audio"]
+                        if "text" in phonetic and phonetic["text"]:
+                            phonetic_text = phonetic["text"]
+                        break
         
-        return enhanced_list
\ No newline at end of file
+        return phonetic_text, audio_url
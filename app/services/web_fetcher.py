@@ -1,64 +1,457 @@
 import asyncio
+import codecs
 import os
-from typing import Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit
 
+import aiohttp
 from fastapi import HTTPException
 from fetchfox_sdk import FetchFox
 
+from app.config import settings
+from app.services.html_extractor import ArticleExtractor
+from app.services.http_client import HttpClient
+from app.utils.cache import MISSING, TieredCache, create_tiered_cache
+from app.utils.metrics import track_upstream
+from app.utils.resilience import CircuitOpenError, UpstreamPolicy
+from app.utils.singleflight import SingleFlight
 from app.utils.text_utils import preprocess_markdown
+from app.utils.url_guard import PublicAddressResolver, UnsafeURLError, check_url
 
 class WebFetcher:
-    """Service class for fetching content from URLs using fetchfox."""
-    
-    def __init__(self):
+    """
+    Service class for fetching content from URLs.
+
+    With the local backend pages are downloaded with the aiohttp pool
+    (up to ``max_bytes``) and parsed as they stream in by ArticleExtractor;
+    FetchFox is only used as a fallback when local extraction fails, if
+    enabled. With the fetchfox backend every page goes through FetchFox.
+
+    URLs come from clients, so only http(s) URLs are accepted and page
+    requests go through their own connection pool whose resolver refuses
+    loopback, private, link-local and other non-public addresses.
+    Redirects are followed one hop at a time and every hop is checked the
+    same way (``allow_private_addresses`` lifts the address check, for
+    local testing only).
+
+    One instance is shared by all requests. The blocking FetchFox SDK runs in
+    a bounded thread pool (one client per worker thread) and HTML parsing in
+    another, so neither stalls the event loop. Results are cached per URL:
+    within ``fresh_ttl`` they are served as-is, after that they are
+    revalidated with a conditional request (ETag / Last-Modified) and only
+    re-extracted if the page changed.
+    """
+
+    def __init__(self, http_client: Optional[HttpClient] = None):
         """Initialize the WebFetcher service."""
         self.api_key = os.getenv("FETCHFOX_API_KEY", "")
         if not self.api_key:
             print("Warning: FETCHFOX_API_KEY environment variable is not set")
-        self.fox = FetchFox(api_key=self.api_key)
-    
-    async def fetch_content(self, url: str) -> Dict[str, Any]:
+        self.allow_private_addresses = settings.web_fetcher_allow_private_addresses
+        self.max_redirects = settings.web_fetcher_max_redirects
+        self.http_client = http_client or HttpClient(
+            resolver=None if self.allow_private_addresses else PublicAddressResolver()
+        )
+        self.backend = settings.web_fetcher_backend
+        self.fetchfox_fallback = settings.web_fetcher_fetchfox_fallback
+        self.max_bytes = settings.web_fetcher_max_bytes
+        self.min_content_chars = settings.web_fetcher_min_content_chars
+        self.download_timeout = settings.web_fetcher_download_timeout
+        self.user_agent = settings.web_fetcher_user_agent
+        self.timeout = settings.web_fetcher_timeout
+        self.fresh_ttl = settings.web_cache_fresh_ttl
+        self.revalidate_timeout = settings.web_cache_revalidate_timeout
+        self.batch_concurrency = settings.web_fetcher_batch_concurrency
+        self.batch_per_host = settings.web_fetcher_batch_per_host
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.web_fetcher_concurrency,
+            thread_name_prefix="fetchfox"
+        )
+        self._parse_executor = ThreadPoolExecutor(
+            max_workers=settings.web_fetcher_concurrency,
+            thread_name_prefix="html-parse"
+        )
+        self._local = threading.local()
+        self._flights = SingleFlight()
+        self.cache = self._create_cache() if settings.web_cache_enabled else None
+        self.resilience = UpstreamPolicy(
+            "fetchfox",
+            retryable=lambda e: isinstance(e, HTTPException) and e.status_code >= 500,
+            max_retries=settings.fetchfox_max_retries,
+            deadline=settings.fetchfox_deadline,
+            # A timed-out extraction keeps its worker thread busy and may still spend credits
+            retry_timeouts=False
+        )
+
+    @staticmethod
+    def _create_cache() -> TieredCache:
+        """Create the URL result cache from the [web_fetcher] settings."""
+        return create_tiered_cache(
+            memory_size=settings.web_cache_memory_size,
+            ttl=settings.web_cache_ttl,
+            disk_path=settings.web_cache_disk_path,
+            table="web_cache",
+            disk_max_entries=settings.web_cache_disk_max_entries
+        )
+
+    @property
+    def fox(self) -> FetchFox:
+        """FetchFox client of the current worker thread."""
+        fox = getattr(self._local, "fox", None)
+        if fox is None:
+            fox = self._local.fox = FetchFox(api_key=self.api_key)
+        return fox
+
+    async def fetch_content(self, url: str, fresh: bool = False) -> Dict[str, Any]:
         """
-        Fetch content from the specified URL using fetchfox.
-        
+        Fetch content from the specified URL.
+
+        When the page cannot be extracted again because the site or FetchFox
+        is failing, a cached result past its freshness is served instead of
+        the error.
+
         Args:
             url: The URL to fetch content from
-            
+            fresh: Skip the cached result and extract the page again
+
         Returns:
             Dictionary containing the fetched content and metadata
+
+        Raises:
+            HTTPException: 400 for URLs that must not be fetched
         """
         try:
-            # Create extraction request for fetchfox
-            items = self.fox.extract(
+            check_url(url, self.allow_private_addresses)
+        except UnsafeURLError as e:
+            raise HTTPException(status_code=400, detail=f"URL not allowed: {e}")
+
+        key = urldefrag(url)[0]
+        cached = MISSING
+        if self.cache is not None and not fresh:
+            cached = await self.cache.get(key)
+            if cached is not MISSING and await self._is_current(key, cached):
+                return cached["result"]
+
+        try:
+            # Concurrent requests for the same page share one extraction
+            return await self._flights.do(("web", key), lambda: self._fetch_and_cache(url, key))
+        except HTTPException as e:
+            if cached is not MISSING and e.status_code >= 500:
+                return cached["result"]
+            raise
+
+    async def fetch_batch(
+        self, urls: List[str], deadline: float, fresh: bool = False
+    ) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]], Optional[HTTPException]]]:
+        """
+        Fetch many URLs concurrently, yielding results as they complete.
+
+        At most ``batch_concurrency`` pages are fetched at the same time and
+        at most ``batch_per_host`` from any one host. URLs not fetched within
+        ``deadline`` seconds are reported as timed out; fetches still pending
+        when the deadline passes or the consumer stops iterating are cancelled.
+
+        Args:
+            urls: The URLs to fetch (expected to be validated and unique)
+            deadline: Time budget for the whole batch, in seconds
+            fresh: Skip cached results
+
+        Yields:
+            Tuples of (url, result or None, error or None)
+        """
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        async def fetch(url: str) -> Dict[str, Any]:
+            host = urlsplit(url).netloc.lower()
+            host_semaphore = host_semaphores.setdefault(host, asyncio.Semaphore(self.batch_per_host))
+            async with host_semaphore, semaphore:
+                return await self.fetch_content(url, fresh=fresh)
+
+        tasks = {asyncio.ensure_future(fetch(url)): url for url in urls}
+        pending = set(tasks)
+        end = time.monotonic() + deadline
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(end - time.monotonic(), 0), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        yield tasks[task], task.result(), None
+                    elif isinstance(error, HTTPException):
+                        yield tasks[task], None, error
+                    else:
+                        yield tasks[task], None, HTTPException(
+                            status_code=500,
+                            detail=f"Failed to fetch content from URL: {str(error)}"
+                        )
+
+            for task in pending:
+                yield tasks[task], None, HTTPException(
+                    status_code=504,
+                    detail="Batch deadline exceeded before the URL was fetched"
+                )
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _is_current(self, key: str, cached: Dict[str, Any]) -> bool:
+        """
+        Check whether a cached page can still be served, revalidating it if stale.
+
+        A page confirmed unchanged by the origin is marked fresh again.
+        """
+        if time.time() - cached["fetched_at"] < self.fresh_ttl:
+            return True
+        if not cached.get("etag") and not cached.get("last_modified"):
+            return False
+
+        validators = await self._fetch_validators(key, cached)
+        if validators is None:
+            return False
+        if validators.get("not_modified") or (
+            (validators["etag"] or validators["last_modified"])
+            and validators["etag"] == cached.get("etag")
+            and validators["last_modified"] == cached.get("last_modified")
+        ):
+            await self.cache.set(key, {**cached, "fetched_at": time.time()})
+            return True
+        return False
+
+    async def _fetch_validators(self, url: str, cached: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the ETag and Last-Modified of a page with a (conditional) HEAD request.
+
+        The request goes through the same URL and address checks as page
+        downloads, redirects included.
+
+        Returns:
+            Dictionary with the validators and whether the origin answered
+            304 Not Modified, or None if the request failed
+        """
+        headers = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            with track_upstream("web") as call:
+                async with self._open("HEAD", url, headers, self.revalidate_timeout) as response:
+                    if response.status >= 400:
+                        call.fail()
+                        return None
+                    return {
+                        "not_modified": response.status == 304,
+                        "etag": response.headers.get("ETag", ""),
+                        "last_modified": response.headers.get("Last-Modified", "")
+                    }
+        except (aiohttp.ClientError, asyncio.TimeoutError, UnsafeURLError):
+            return None
+
+    @asynccontextmanager
+    async def _open(
+        self, method: str, url: str, headers: Dict[str, str], timeout: float
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        Send a request for a page, following redirects only to allowed URLs.
+
+        Raises:
+            UnsafeURLError: The URL or a redirect target must not be fetched
+            aiohttp.ClientError: On transport errors (including host names
+                                 resolving to non-public addresses) and
+                                 too many redirects
+        """
+        for _ in range(self.max_redirects + 1):
+            check_url(url, self.allow_private_addresses)
+            response = await self.http_client.session.request(
+                method,
                 url,
-                {
-                    'title': 'What is the article title?', 
-                    'description': 'What is the meta description?', 
-                    'content': 'What is the full article content?'
-                }
+                headers=headers,
+                allow_redirects=False,
+                timeout=aiohttp.ClientTimeout(total=timeout)
             )
-            
-            # Extract the first result
-            result = items.limit(1)[0]
-            
-            if not result:
+            location = response.headers.get("Location")
+            if response.status in (301, 302, 303, 307, 308) and location:
+                response.release()
+                url = urljoin(str(response.url), location)
+                continue
+            try:
+                yield response
+            finally:
+                response.release()
+            return
+        raise aiohttp.ClientError(f"More than {self.max_redirects} redirects")
+
+    async def _fetch_and_cache(self, url: str, key: str) -> Dict[str, Any]:
+        result, validators = await self._fetch(url, key)
+        if self.cache is not None:
+            await self.cache.set(key, {
+                "result": result,
+                "etag": validators.get("etag", ""),
+                "last_modified": validators.get("last_modified", ""),
+                "fetched_at": time.time()
+            })
+        return result
+
+    async def _fetch(self, url: str, key: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Extract a page with the configured backend.
+
+        Returns:
+            Tuple of (result, cache validators of the page)
+        """
+        validators = None
+        if self.backend == "local":
+            result, validators = await self._extract_local(url)
+            if result is not None and len(result["content"]) >= self.min_content_chars:
+                return result, validators
+            if not self.fetchfox_fallback:
+                if validators is None:
+                    raise HTTPException(
+                        status_code=502,
+                        detail="Failed to fetch content from URL"
+                    )
                 raise HTTPException(
                     status_code=404,
                     detail="No content could be extracted from the provided URL"
                 )
-            
-            # Structure the response
-            response = {
-                "url": url,
-                "title": result.get('title', ""),
-                "description": result.get('description', ""),
-                "content": result.get('content', "")
-            }
-            
-            return response
-                
+
+        if validators is not None or self.cache is None:
+            return await self._extract(url), validators or {}
+        # Validators are read alongside the extraction for later revalidation
+        result, validators = await asyncio.gather(self._extract(url), self._fetch_validators(key))
+        return result, validators or {}
+
+    async def _extract_local(self, url: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Download a page and extract its article locally.
+
+        The body is decoded and fed to the parser chunk by chunk as it
+        arrives; anything past ``max_bytes`` is not downloaded.
+
+        Returns:
+            Tuple of (result or None if the page is not HTML, validators or
+            None if the download failed)
+        """
+        loop = asyncio.get_running_loop()
+        parser = ArticleExtractor()
+        headers = {"User-Agent": self.user_agent, "Accept": "text/html,application/xhtml+xml"}
+        try:
+            with track_upstream("web") as call:
+                async with self._open("GET", url, headers, self.download_timeout) as response:
+                    if response.status >= 400:
+                        call.fail()
+                        return None, None
+                    validators = {
+                        "etag": response.headers.get("ETag", ""),
+                        "last_modified": response.headers.get("Last-Modified", "")
+                    }
+                    if response.content_type not in ("text/html", "application/xhtml+xml"):
+                        return None, validators
+
+                    try:
+                        decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(errors="replace")
+                    except LookupError:
+                        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+                    received = 0
+                    async for chunk in response.content.iter_chunked(65536):
+                        chunk = chunk[:self.max_bytes - received]
+                        received += len(chunk)
+                        await loop.run_in_executor(self._parse_executor, parser.feed, decoder.decode(chunk))
+                        if received >= self.max_bytes:
+                            break
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return None, None
+
+        def finish() -> Dict[str, str]:
+            parser.feed(decoder.decode(b"", final=True))
+            parser.close()
+            return parser.result()
+
+        extracted = await loop.run_in_executor(self._parse_executor, finish)
+        return {"url": url, **extracted}, validators
+
+    async def _extract(self, url: str) -> Dict[str, Any]:
+        """
+        Run the FetchFox extraction, retrying server errors.
+
+        Timed-out extractions are neither retried nor hedged: the worker
+        thread cannot be interrupted, so a second request would tie up
+        another thread and spend FetchFox credits twice.
+        """
+        try:
+            return await self.resilience.call(lambda: self._extract_once(url))
+        except CircuitOpenError:
+            raise HTTPException(
+                status_code=503,
+                detail="Content extraction is temporarily unavailable, please try again later"
+            )
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=504,
+                detail="Timed out fetching content from URL"
+            )
+
+    async def _extract_once(self, url: str) -> Dict[str, Any]:
+        """Run one FetchFox extraction in the thread pool; raises asyncio.TimeoutError after ``timeout``."""
+        loop = asyncio.get_running_loop()
+        try:
+            with track_upstream("fetchfox"):
+                return await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, self._extract_blocking, url),
+                    timeout=self.timeout
+                )
+        except (HTTPException, asyncio.TimeoutError):
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to fetch content from URL: {str(e)}"
-            )
\ No newline at end of file
+            )
+
+    def _extract_blocking(self, url: str) -> Dict[str, Any]:
+        # Create extraction request for fetchfox
+        items = self.fox.extract(
+            url,
+            {
+                'title': 'What is the article title?',
+                'description': 'What is the meta description?',
+                'content': 'What is the full article content?'
+            }
+        )
+
+        # Extract the first result
+        result = items.limit(1)[0]
+
+        if not result:
+            raise HTTPException(
+                status_code=404,
+                detail="No content could be extracted from the provided URL"
+            )
+
+        # Structure the response
+        response = {
+            "url": url,
+            "title": result.get('title', ""),
+            "description": result.get('description', ""),
+            "content": result.get('content', "")
+        }
+
+        return response
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._parse_executor.shutdown(wait=False, cancel_futures=True)
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,78 @@
+import os
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+
+class WordFrequencyIndex:
+    """
+    Compact word -> frequency rank index.
+
+    Instead of a dict of strings, the index keeps two parallel arrays: the
+    sorted 64-bit hashes of the words and their ranks. A lookup is a binary
+    search over a flat ``array('q')``, and 30k words take about 360 KB.
+    Hashes are only meaningful within the process that built the index, so
+    it is always built at startup from the word list file.
+
+    Word lists derived from binned frequencies (such as wordfreq's) list the
+    words of one bin alphabetically, so their order within a bin says
+    nothing about frequency. Every alphabetical run of the list is taken as
+    one bin and its words share the rank of its first word.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        """
+        Build the index.
+
+        Args:
+            words: Words ordered from most to least frequent; rank 1 is the first
+        """
+        pairs = {}
+        previous = ""
+        bin_rank = 1
+        for rank, word in enumerate(words, start=1):
+            word = word.strip().lower()
+            if word <= previous:
+                # Out of alphabetical order: a new frequency bin starts here
+                bin_rank = rank
+            previous = word
+            pairs.setdefault(hash(word), bin_rank)
+
+        ordered = sorted(pairs.items())
+        self._hashes = array("q", (h for h, _ in ordered))
+        self._ranks = array("I", (r for _, r in ordered))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["WordFrequencyIndex"]:
+        """
+        Load the index from a word list file (one word per line, most frequent first).
+
+        Lines starting with '#' are ignored.
+
+        Returns:
+            The index, or None if the file does not exist
+        """
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(line for line in f if line.strip() and not line.startswith("#"))
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def rank(self, word: str) -> Optional[int]:
+        """
+        Get the frequency rank of a word.
+
+        Args:
+            word: The word (case-insensitive)
+
+        Returns:
+            1-based rank (1 = most frequent, equal for words of the same bin),
+            or None if the word is not listed
+        """
+        h = hash(word.lower())
+        i = bisect_left(self._hashes, h)
+        if i < len(self._hashes) and self._hashes[i] == h:
+            return self._ranks[i]
+        return None
@@ -0,0 +1,342 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Sentinel returned on a cache miss, so that a cached ``None`` (negative
+# result) can be told apart from "not cached".
+MISSING = object()
+
+
+class CacheStats:
+    """Hit/miss/eviction counters for a cache tier."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class LRUCache:
+    """
+    Bounded in-process LRU cache with per-entry TTL.
+
+    Not thread-safe; meant to be used from the event loop only.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        """
+        Get a value from the cache.
+
+        Returns:
+            The cached value, or MISSING if absent or expired
+        """
+        item = self._data.get(key)
+        if item is None:
+            self.stats.misses += 1
+            return MISSING
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return MISSING
+
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        if self.max_size <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class SQLiteCache:
+    """
+    Persistent key/value cache stored in a local SQLite database.
+
+    Values are stored as JSON. Entries carry an absolute expiry time (wall
+    clock, so it survives restarts) and the table is trimmed to
+    ``max_entries`` by dropping the oldest writes. Expired entries are kept
+    for another ``stale_ttl`` seconds, during which get_stale() still returns
+    them. The methods are blocking and are meant to be run in a worker thread
+    (see TieredCache).
+    """
+
+    # Prune expired/overflowing rows every this many writes
+    PRUNE_INTERVAL = 256
+
+    def __init__(self, path: str, table: str, max_entries: int, ttl: float, stale_ttl: float = 0):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_created_at ON {self.table} (created_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Tuple[Any, float]:
+        """
+        Get a value from the cache.
+
+        Returns:
+            Tuple of (value or MISSING, remaining TTL in seconds)
+        """
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+
+        if row is None:
+            self.stats.misses += 1
+            return MISSING, 0.0
+
+        remaining = row[1] - time.time()
+        if remaining <= 0:
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return MISSING, 0.0
+
+        self.stats.hits += 1
+        return json.loads(row[0]), remaining
+
+    def get_stale(self, key: str) -> Any:
+        """
+        Get a value even if it has expired, as long as it is within ``stale_ttl``.
+
+        Returns:
+            The value, or MISSING
+        """
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT value FROM {self.table} WHERE key = ? AND expires_at > ?",
+                (key, time.time() - self.stale_ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else MISSING
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a JSON-serializable value."""
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_INTERVAL == 0:
+                self._prune(conn, now)
+            conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            conn.commit()
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = conn.execute(
+            f"DELETE FROM {self.table} WHERE expires_at <= ?", (now - self.stale_ttl,)
+        ).rowcount
+        self.stats.expirations += max(expired, 0)
+
+        count = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY created_at LIMIT ?)",
+                (overflow,),
+            )
+            self.stats.evictions += overflow
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class TieredCache:
+    """
+    Two-tier cache: an in-memory LRU in front of an optional SQLite store.
+
+    Memory hits are served without leaving the event loop; disk reads and
+    writes run in a worker thread. Entries found on disk are promoted to the
+    memory tier for their remaining lifetime.
+    """
+
+    def __init__(self, memory: LRUCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    async def get(self, key: str) -> Any:
+        """
+        Get a value from the fastest tier that has it.
+
+        Returns:
+            The cached value, or MISSING
+        """
+        value = self.memory.get(key)
+        if value is not MISSING or self.disk is None:
+            return value
+
+        try:
+            value, remaining = await asyncio.to_thread(self.disk.get, key)
+        except sqlite3.Error:
+            return MISSING
+
+        if value is not MISSING:
+            self.memory.set(key, value, ttl=min(remaining, self.memory.ttl))
+        return value
+
+    async def get_stale(self, key: str) -> Any:
+        """
+        Get a value from the disk tier even if it has expired (see SQLiteCache.get_stale).
+
+        Meant as a fallback while the source of the values is failing; the
+        value is not promoted to the memory tier.
+
+        Returns:
+            The value, or MISSING
+        """
+        if self.disk is None:
+            return MISSING
+        try:
+            return await asyncio.to_thread(self.disk.get_stale, key)
+        except sqlite3.Error:
+            return MISSING
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value in every tier."""
+        self.memory.set(key, value, ttl=ttl)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.set, key, value, ttl)
+            except (sqlite3.Error, TypeError, ValueError):
+                pass
+
+    async def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.delete, key)
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-tier counters."""
+        stats = {"memory": {**self.memory.stats.as_dict(), "size": len(self.memory)}}
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats.as_dict()
+        return stats
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+
+def create_tiered_cache(
+    memory_size: int,
+    ttl: float,
+    disk_path: str = "",
+    table: str = "cache",
+    disk_max_entries: int = 0,
+    stale_ttl: float = 0,
+) -> TieredCache:
+    """
+    Create a TieredCache; the disk tier is left out when ``disk_path`` is empty.
+    """
+    disk = None
+    if disk_path:
+        disk = SQLiteCache(path=disk_path, table=table, max_entries=disk_max_entries, ttl=ttl, stale_ttl=stale_ttl)
+    return TieredCache(LRUCache(max_size=memory_size, ttl=ttl), disk)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for content addressing (Unicode NFC, collapsed whitespace)."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def content_key(*parts: Any) -> str:
+    """
+    Build a content-addressed cache key.
+
+    Args:
+        parts: Key components; strings are used as-is, anything else is
+               serialized as canonical JSON
+
+    Returns:
+        Hex SHA-256 digest of the components
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, str):
+            part = json.dumps(part, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
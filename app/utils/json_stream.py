@@ -0,0 +1,102 @@
+import json
+from typing import Any, List, Optional
+
+
+class JsonArrayStream:
+    """
+    Incremental parser for the elements of a top-level JSON array.
+
+    Text is fed in arbitrary chunks (e.g. as a model streams its answer) and
+    every array element is returned as soon as its closing character has
+    arrived, without waiting for the rest of the array. Anything before the
+    opening bracket, such as a Markdown code fence, is ignored. Elements that
+    are not valid JSON are skipped.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self.finished = False
+        self._element_start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def _parse(self, start: int, end: int, elements: List[Any]) -> None:
+        try:
+            elements.append(json.loads(self._buffer[start:end]))
+        except json.JSONDecodeError:
+            pass
+        self._element_start = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Feed the next chunk of text.
+
+        Args:
+            chunk: Next piece of the streamed JSON text
+
+        Returns:
+            Array elements completed by this chunk, in order
+        """
+        elements: List[Any] = []
+        if self.finished:
+            return elements
+
+        self._buffer += chunk
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer) and not self.finished:
+            ch = buffer[i]
+
+            if not self._started:
+                self._started = ch == "["
+                i += 1
+                continue
+
+            if self._element_start is None:
+                if ch in " \t\r\n,":
+                    i += 1
+                    continue
+                if ch == "]":
+                    self.finished = True
+                    i += 1
+                    continue
+                self._element_start = i
+                self._depth = 0
+                self._in_string = False
+                self._escape = False
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 0:
+                        self._parse(self._element_start, i + 1, elements)
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the array right after a scalar element
+                    self._parse(self._element_start, i, elements)
+                    continue
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parse(self._element_start, i + 1, elements)
+            elif ch == "," and self._depth == 0:
+                self._parse(self._element_start, i, elements)
+            i += 1
+
+        # Drop the consumed text so the buffer only holds the pending element
+        keep_from = self._element_start if self._element_start is not None else i
+        self._buffer = buffer[keep_from:]
+        self._pos = i - keep_from
+        if self._element_start is not None:
+            self._element_start = 0
+        return elements
@@ -0,0 +1,358 @@
+import asyncio
+import bisect
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from cache hits to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    """
+    Base of the metric types: a name, help text and one child per label value combination.
+
+    Children are created on first use and cached, so updating a metric is a
+    dictionary lookup plus an addition. Metrics are updated from the event
+    loop only and need no locking.
+    """
+
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Get the child for the given label values (in ``labelnames`` order)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def render(self, lines: List[str]) -> None:
+        """Append the metric in the Prometheus text exposition format."""
+        lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} {self.TYPE}")
+        for values, child in self._children.items():
+            child.render(self.name, _format_labels(self.labelnames, values), lines)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def render(self, name: str, labels: str, lines: List[str]) -> None:
+        lines.append(f"{name}{labels} {_format_value(self.value)}")
+
+
+class _GaugeValue(_Value):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str, lines: List[str]) -> None:
+        prefix = labels[:-1] + "," if labels else "{"
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{prefix}le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f'{name}_bucket{prefix}le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{labels} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{labels} {self.count}")
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+
+class Gauge(_Metric):
+    TYPE = "gauge"
+
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._children[()].dec(amount)
+
+    def set(self, value: float) -> None:
+        self._children[()].set(value)
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional["Registry"] = None,
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+
+class Registry:
+    """
+    Collection of metrics rendered together by the /metrics endpoint.
+
+    Besides registered metrics, collectors (callables returning metrics)
+    are run at scrape time for values that are read from elsewhere, such as
+    cache counters.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def register_collector(self, collector: Callable[[], Iterable[_Metric]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            metric.render(lines)
+        for collector in self._collectors:
+            for metric in collector():
+                metric.render(lines)
+        lines.append("")
+        return "\n".join(lines)
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status code",
+    ("method", "route", "status"), REGISTRY
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time until the response was fully sent",
+    ("method", "route"), REGISTRY
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served", (), REGISTRY)
+UPSTREAM_REQUESTS = Counter(
+    "upstream_requests_total", "Calls to upstream services by outcome (ok, error, cancelled)",
+    ("upstream", "outcome"), REGISTRY
+)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds", "Duration of calls to upstream services",
+    ("upstream",), REGISTRY
+)
+UPSTREAM_REQUESTS_IN_FLIGHT = Gauge(
+    "upstream_requests_in_flight", "Calls to upstream services in progress",
+    ("upstream",), REGISTRY
+)
+UPSTREAM_RETRIES = Counter(
+    "upstream_retries_total", "Upstream calls retried after a transient failure",
+    ("upstream",), REGISTRY
+)
+UPSTREAM_HEDGES = Counter(
+    "upstream_hedges_total", "Second requests sent for slow upstream calls",
+    ("upstream",), REGISTRY
+)
+UPSTREAM_REJECTED = Counter(
+    "upstream_rejected_total", "Upstream calls refused because the circuit was open",
+    ("upstream",), REGISTRY
+)
+UPSTREAM_CIRCUIT_OPEN = Gauge(
+    "upstream_circuit_open", "Whether the circuit breaker of an upstream is open (1) or closed (0)",
+    ("upstream",), REGISTRY
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late a timer on the event loop fired",
+    (), REGISTRY, buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    """
+    Measure event loop lag until cancelled.
+
+    Sleeps for ``interval`` seconds in a loop and records by how much each
+    wake-up overshot; a blocked loop shows up as a large overshoot.
+    """
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(time.perf_counter() - start - interval, 0.0))
+
+
+class track_upstream:
+    """
+    Context manager recording the duration and outcome of an upstream call.
+
+    An exception leaving the block counts as an error (a cancellation as
+    cancelled); failures that are handled inside the block can be recorded
+    with fail(). Works around ``await`` as well as around blocking code.
+
+    Example:
+        with track_upstream("dictionary_api") as call:
+            async with session.get(url) as response:
+                if response.status >= 500:
+                    call.fail()
+    """
+
+    __slots__ = ("upstream", "failed", "_start")
+
+    def __init__(self, upstream: str):
+        self.upstream = upstream
+        self.failed = False
+        self._start = 0.0
+
+    def fail(self) -> None:
+        self.failed = True
+
+    def __enter__(self) -> "track_upstream":
+        UPSTREAM_REQUESTS_IN_FLIGHT.labels(self.upstream).inc()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        duration = time.perf_counter() - self._start
+        UPSTREAM_REQUESTS_IN_FLIGHT.labels(self.upstream).dec()
+        UPSTREAM_REQUEST_DURATION.labels(self.upstream).observe(duration)
+        if exc_type is not None and not issubclass(exc_type, Exception):
+            outcome = "cancelled"
+        elif exc_type is not None or self.failed:
+            outcome = "error"
+            logger.warning("%s call failed after %.3fs: %r", self.upstream, duration, exc)
+        else:
+            outcome = "ok"
+        UPSTREAM_REQUESTS.labels(self.upstream, outcome).inc()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request.
+
+    Requests are labelled with the route template (``/lookup/{word}``) rather
+    than the raw path, so label cardinality stays bounded; requests that
+    match no route are labelled "unmatched". The duration runs until the
+    last body chunk is sent, which for streaming endpoints includes the
+    whole stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            # Endpoints are functions; map them back to their path template once
+            for candidate in getattr(scope.get("app"), "routes", ()):
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = candidate.path
+                    break
+            else:
+                route = "unmatched"
+            self._routes[endpoint] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            method = scope["method"]
+            route = self._route(scope)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            HTTP_REQUEST_DURATION.labels(method, route).observe(duration)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s %s %d %.3fs", method, route, status, duration)
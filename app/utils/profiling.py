@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+
+def _stack_key(frame) -> str:
+    """Render a frame's stack root-first in the collapsed ("folded") format."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler(threading.Thread):
+    """
+    Background thread sampling the stack of another thread.
+
+    Every ``interval`` seconds the current frame of the target thread is read
+    with ``sys._current_frames()`` and counted by stack. Sampling the event
+    loop thread shows where loop time goes, including code that blocks it,
+    without instrumenting anything; the cost is one stack walk per sample.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[_stack_key(frame)] += 1
+            del frame
+
+    def stop(self) -> Counter:
+        """Stop sampling and return the sample counts per stack."""
+        self._stopped.set()
+        self.join()
+        return self.samples
+
+
+def write_folded(path: str, samples: Counter, header: List[str]) -> None:
+    """Write samples in the folded format read by flamegraph.pl and speedscope."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for line in header:
+            f.write(f"# {line}\n")
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware capturing a sampling profile of single requests on demand.
+
+    A request with an ``X-Profile`` header or a ``profile=1`` query parameter
+    (and the configured token, if any, as the header value or ``profile``
+    parameter) is profiled: the event loop thread is sampled from a
+    background thread while the request runs and the folded stacks are
+    written to ``output_dir``. The response carries the profile id in an
+    ``X-Profile-Id`` header. Samples cover everything the loop runs during
+    the request, so profile a request on an otherwise idle instance for a
+    clean picture.
+    """
+
+    def __init__(self, app, output_dir: str, interval: float, token: str = ""):
+        self.app = app
+        self.output_dir = output_dir
+        self.interval = interval
+        self.token = token
+
+    def _requested(self, scope) -> bool:
+        values = [value.decode("latin-1") for name, value in scope["headers"] if name == b"x-profile"]
+        values += parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile", [])
+        if self.token:
+            return self.token in values
+        return any(value not in ("", "0", "false") for value in values)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            samples = sampler.stop()
+            header = [
+                f"{scope['method']} {scope['path']}",
+                f"duration {time.perf_counter() - start:.3f}s, {sum(samples.values())} samples every {self.interval * 1000:g}ms",
+            ]
+            path = os.path.join(self.output_dir, f"{profile_id}.folded")
+            try:
+                await asyncio.to_thread(write_folded, path, samples, header)
+                logger.info("Profile of %s %s written to %s", scope["method"], scope["path"], path)
+            except OSError as e:
+                logger.warning("Could not write profile %s: %s", path, e)
+
+
+class LoopWatchdog:
+    """
+    Detect event loop stalls and log what is blocking the loop.
+
+    A heartbeat callback on the loop records the time every ``interval``
+    seconds; a watchdog thread checks it and, when the loop has not run it
+    for ``threshold`` seconds, logs the loop thread's current stack (the code
+    that is blocking it) once per stall, then the stall's total duration
+    once the loop is back.
+    """
+
+    def __init__(self, threshold: float, interval: Optional[float] = None):
+        self.threshold = threshold
+        self.interval = interval or min(threshold / 4, 0.05)
+        self.stalls = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id = 0
+        self._heartbeat = time.perf_counter()
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start watching the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._beat()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def _beat(self) -> None:
+        self._heartbeat = time.perf_counter()
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _watch(self) -> None:
+        stalled_since: Optional[float] = None
+        while not self._stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+            blocked = time.perf_counter() - heartbeat - self.interval
+            if blocked >= self.threshold and stalled_since != heartbeat:
+                stalled_since = heartbeat
+                self.stalls += 1
+                frame = sys._current_frames().get(self._thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame is not None else "(no frame)\n"
+                del frame
+                logger.warning("Event loop blocked for %.3fs, stack of the loop thread:\n%s", blocked, stack.rstrip())
+            elif stalled_since is not None and heartbeat != stalled_since:
+                logger.warning("Event loop stall ended after %.3fs", heartbeat - stalled_since - self.interval)
+                stalled_since = None
+
+    def stats(self) -> Dict[str, float]:
+        return {"stalls": self.stalls, "threshold": self.threshold}
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._handle is not None:
+            self._handle.cancel()
+        if self._thread is not None:
+            self._thread.join()
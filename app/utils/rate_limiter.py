@@ -0,0 +1,255 @@
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are only shared between threads of one process
+    fcntl = None
+
+
+class SharedTokenBuckets:
+    """
+    Token buckets shared by all worker processes through a memory-mapped file.
+
+    The file is a fixed-size open-addressing hash table of
+    (key hash, tokens, last update) slots. A lookup probes at most PROBES
+    consecutive slots and, when the key is not found and none is free,
+    reuses the least recently updated one, so every check costs a hash, a
+    few slot reads and one write under an exclusive file lock, whatever the
+    number of clients. Evicting an idle client only resets its bucket to
+    full, which is what it would have refilled to anyway.
+    """
+
+    MAGIC = b"RLT1"
+    _HEADER = struct.Struct("<4sI")
+    _SLOT = struct.Struct("<Qdd")
+    PROBES = 8
+
+    def __init__(self, path: str, slots: int):
+        self.path = path
+        self.slots = slots
+        self._size = self._HEADER.size + slots * self._SLOT.size
+        self._fd: Optional[int] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _open(self) -> mmap.mmap:
+        if self._mmap is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            with self._locked():
+                # The first process to start (or a changed slot count) lays out an empty table
+                header = os.pread(self._fd, self._HEADER.size, 0)
+                if os.fstat(self._fd).st_size != self._size or header != self._HEADER.pack(self.MAGIC, self.slots):
+                    os.ftruncate(self._fd, 0)
+                    os.ftruncate(self._fd, self._size)
+                    os.pwrite(self._fd, self._HEADER.pack(self.MAGIC, self.slots), 0)
+                self._mmap = mmap.mmap(self._fd, self._size)
+        return self._mmap
+
+    def _offset(self, index: int) -> int:
+        return self._HEADER.size + index * self._SLOT.size
+
+    def acquire(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """
+        Take ``cost`` tokens from the bucket of a key if it has them.
+
+        Args:
+            key: Bucket identity (client and route class)
+            rate: Tokens refilled per second
+            capacity: Bucket size (allowed burst)
+            cost: Tokens the request takes
+
+        Returns:
+            0 if the request is admitted, otherwise the seconds until it would be
+        """
+        # Zero marks a free slot
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
+        table = self._open()
+        now = time.time()
+        with self._locked():
+            slot: Optional[Tuple[int, float]] = None
+            oldest: Optional[Tuple[float, int]] = None
+            for probe in range(self.PROBES):
+                index = (key_hash + probe) % self.slots
+                stored_hash, tokens, updated_at = self._SLOT.unpack_from(table, self._offset(index))
+                if stored_hash == key_hash:
+                    slot = index, min(capacity, tokens + max(now - updated_at, 0.0) * rate)
+                    break
+                if stored_hash == 0:
+                    oldest = (-math.inf, index)
+                elif oldest is None or updated_at < oldest[0]:
+                    oldest = (updated_at, index)
+            if slot is None:
+                slot = oldest[1], capacity
+
+            index, tokens = slot
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / rate if rate > 0 else math.inf
+            self._SLOT.pack_into(table, self._offset(index), key_hash, tokens, now)
+        return wait
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing per-client token bucket limits.
+
+    Each request is charged to the bucket of its client (the peer address,
+    or the X-Forwarded-For address added by the outermost trusted proxy)
+    and route
+    class: "llm" for paths under one of ``llm_prefixes``, which spend Gemini
+    quota, and "default" for everything else. Each class allows ``limit``
+    requests per ``period`` seconds with bursts of up to ``limit``. Batch
+    routes are charged one token per item of their JSON list, up to a
+    whole burst, so a batch costs as much as the single requests it
+    replaces. Rejected requests get 429 with a Retry-After header.
+    """
+
+    def __init__(
+        self,
+        app,
+        buckets: SharedTokenBuckets,
+        limits: Sequence[Tuple[str, Sequence[str], int, float]],
+        exempt: Sequence[str] = (),
+        trusted_proxies: int = 0,
+        batch_fields: Optional[Mapping[str, str]] = None
+    ):
+        """
+        Args:
+            app: The wrapped ASGI app
+            buckets: Shared bucket store
+            limits: (route class, path prefixes, limit, period) in matching
+                    order; an entry with no prefixes matches every path
+            exempt: Paths that are never limited (health checks, metrics)
+            trusted_proxies: Number of proxies in front of the app that append
+                             to X-Forwarded-For (0: ignore the header)
+            batch_fields: Batch route paths mapped to the JSON body field
+                          holding their list of items
+        """
+        self.app = app
+        self.buckets = buckets
+        self.limits: List[Tuple[str, Tuple[str, ...], float, float]] = [
+            (name, tuple(prefixes), limit / period, float(limit)) for name, prefixes, limit, period in limits
+        ]
+        self.exempt = set(exempt)
+        self.trusted_proxies = trusted_proxies
+        self.batch_fields = dict(batch_fields or {})
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    def _count_items(body: bytes, field: str) -> float:
+        """Count the items of a batch request; malformed bodies cost one token and are rejected by the route."""
+        try:
+            items = json.loads(body).get(field)
+        except (ValueError, AttributeError):
+            return 1.0
+        return float(max(len(items), 1)) if isinstance(items, list) else 1.0
+
+    @staticmethod
+    def _replay(body: bytes, receive):
+        """Wrap ``receive`` so the app reads the body that was already consumed."""
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return replay
+
+    def _client(self, scope) -> str:
+        if self.trusted_proxies > 0:
+            # Clients can send any X-Forwarded-For; only the entries appended by
+            # our own proxies, counted from the right, can be trusted
+            forwarded = [
+                address.strip()
+                for name, value in scope["headers"] if name == b"x-forwarded-for"
+                for address in value.decode("latin-1").split(",")
+            ]
+            if len(forwarded) >= self.trusted_proxies:
+                return forwarded[-self.trusted_proxies]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        for name, prefixes, rate, capacity in self.limits:
+            if not prefixes or path.startswith(prefixes):
+                break
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        cost = 1.0
+        field = self.batch_fields.get(path)
+        if field is not None and scope["method"] == "POST":
+            body = await self._read_body(receive)
+            cost = min(self._count_items(body, field), capacity)
+            receive = self._replay(body, receive)
+
+        wait = self.buckets.acquire(f"{name}:{self._client(scope)}", rate, capacity, cost)
+        if wait <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = str(max(1, math.ceil(wait)))
+        body = json.dumps({"detail": f"Rate limit exceeded, retry in {retry_after} seconds"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", retry_after.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,297 @@
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.config import settings
+from app.utils.metrics import UPSTREAM_CIRCUIT_OPEN, UPSTREAM_HEDGES, UPSTREAM_REJECTED, UPSTREAM_RETRIES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+    def __init__(self, upstream: str, retry_in: float):
+        super().__init__(f"{upstream} is unavailable, retry in {retry_in:.1f}s")
+        self.upstream = upstream
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` failed calls in a row the circuit opens and
+    calls are refused for ``reset_timeout`` seconds. Then a single trial call
+    is let through (half-open): a success closes the circuit, a failure keeps
+    it open for another ``reset_timeout``. A trial call that never reports
+    back (cancelled) cannot wedge the breaker, since the next one is let
+    through after the following timeout anyway.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() - self.opened_at < self.reset_timeout else "half_open"
+
+    def retry_in(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(self.opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        """Check whether a call may go out, taking the trial slot when half-open."""
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_timeout:
+            return False
+        # Re-arm the timeout so only this call probes the upstream
+        self.opened_at = now
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self.opened_at is not None:
+            logger.info("%s circuit closed", self.name)
+            self.opened_at = None
+            UPSTREAM_CIRCUIT_OPEN.labels(self.name).set(0)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is not None:
+            # Failed trial call
+            self.opened_at = time.monotonic()
+        elif self.failure_threshold > 0 and self.failures >= self.failure_threshold:
+            logger.warning("%s circuit opened after %d consecutive failures", self.name, self.failures)
+            self.opened_at = time.monotonic()
+            self.trips += 1
+            UPSTREAM_CIRCUIT_OPEN.labels(self.name).set(1)
+
+
+class LatencyTracker:
+    """Window of the most recent successful call latencies."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        """Get the ``q`` quantile (0 < q < 1) of the window by the nearest-rank method."""
+        ordered = sorted(self._samples)
+        return ordered[min(max(math.ceil(q * len(ordered)) - 1, 0), len(ordered) - 1)]
+
+
+class UpstreamPolicy:
+    """
+    Retry, hedging and circuit breaking for the calls to one upstream.
+
+    ``call()`` runs an operation under a deadline for the whole call:
+
+    - failures that ``retryable`` accepts (timeouts, server errors) are
+      retried up to ``max_retries`` times after a full-jitter exponential
+      backoff (a random delay up to ``backoff_base * 2**attempt``, capped at
+      ``backoff_max``), as long as the retry can start before the deadline.
+      A slow attempt is never cut short before the deadline, so a healthy
+      but slow upstream still answers;
+    - with a ``hedge_percentile``, an attempt still running after that
+      percentile of recent latencies gets a second, identical request, and
+      whichever answers first wins (the other is cancelled). Hedges are
+      capped at ``hedge_budget`` of all calls so a slow upstream does not get
+      twice the load. Only idempotent operations may be hedged;
+    - the outcome of each call (not of each attempt, so one unlucky call
+      counts once) feeds a CircuitBreaker; while it is open calls fail at
+      once with CircuitOpenError, which callers turn into a fallback (stale
+      cache, local generation) or a 503.
+
+    Timeouts (asyncio.TimeoutError) always count as failures and are
+    retried unless ``retry_timeouts`` is off. Errors ``retryable`` rejects (a 404, a bad request) mean the upstream
+    answered: they are raised right away and count as a success for the
+    breaker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        retryable: Callable[[BaseException], bool],
+        max_retries: int = 0,
+        deadline: Optional[float] = None,
+        retry_timeouts: bool = True,
+        hedge_percentile: float = 0.0,
+        hedge_budget: Optional[float] = None,
+        hedge_min_samples: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+    ):
+        """
+        Args:
+            name: Upstream name used in logs and metrics
+            retryable: Whether an error is a transient upstream failure
+            max_retries: Retries after the first attempt
+            deadline: Seconds the whole call may take, retries included (None: unbounded)
+            retry_timeouts: Retry attempts that raised asyncio.TimeoutError; turn off
+                            when a timed-out attempt keeps running (work in a thread)
+            hedge_percentile: Latency quantile after which a hedge is sent (0 disables hedging)
+            hedge_budget: Maximum share of calls that may be hedged
+            hedge_min_samples: Latencies needed before hedging starts
+            backoff_base: First retry delay bound in seconds
+            backoff_max: Upper bound of the retry delay
+            failure_threshold: Consecutive failures that open the circuit (0 disables the breaker)
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.name = name
+        self.retryable = retryable
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.retry_timeouts = retry_timeouts
+        self.hedge_percentile = hedge_percentile
+        self.hedge_budget = hedge_budget if hedge_budget is not None else settings.resilience_hedge_budget
+        self.hedge_min_samples = (
+            hedge_min_samples if hedge_min_samples is not None else settings.resilience_hedge_min_samples
+        )
+        self.backoff_base = backoff_base if backoff_base is not None else settings.resilience_backoff_base
+        self.backoff_max = backoff_max if backoff_max is not None else settings.resilience_backoff_max
+        self.breaker = CircuitBreaker(
+            name,
+            failure_threshold if failure_threshold is not None else settings.resilience_breaker_failures,
+            reset_timeout if reset_timeout is not None else settings.resilience_breaker_reset
+        )
+        self.latencies = LatencyTracker()
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.rejected = 0
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile <= 0 or len(self.latencies) < self.hedge_min_samples:
+            return None
+        if self.hedges >= self.hedge_budget * self.calls:
+            return None
+        return self.latencies.percentile(self.hedge_percentile)
+
+    def _backoff(self, retry: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** retry))
+
+    async def call(self, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run an operation with the policy.
+
+        Args:
+            operation: Creates a new attempt each time it is called
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            CircuitOpenError: The circuit is open
+            asyncio.TimeoutError: The deadline passed
+            Exception: The error of the last attempt
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            UPSTREAM_REJECTED.labels(self.name).inc()
+            raise CircuitOpenError(self.name, self.breaker.retry_in())
+
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline if self.deadline is not None else math.inf
+        retry = 0
+        while True:
+            try:
+                result = await self._attempt(operation, deadline - loop.time())
+            except Exception as e:
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                if not timed_out and not self.retryable(e):
+                    self.breaker.record_success()
+                    raise
+                delay = self._backoff(retry)
+                if (
+                    (timed_out and not self.retry_timeouts)
+                    or retry >= self.max_retries
+                    or loop.time() + delay >= deadline
+                ):
+                    self.breaker.record_failure()
+                    raise
+                retry += 1
+                self.retries += 1
+                UPSTREAM_RETRIES.labels(self.name).inc()
+                logger.info("Retrying %s call in %.3fs (retry %d of %d): %r", self.name, delay, retry, self.max_retries, e)
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def _attempt(self, operation: Callable[[], Awaitable[T]], timeout: float) -> T:
+        """Run one attempt, hedged if it is slow; raises asyncio.TimeoutError after ``timeout``."""
+        if timeout <= 0:
+            raise asyncio.TimeoutError()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        end = start + timeout
+        tasks = {asyncio.ensure_future(operation())}
+        try:
+            hedge_delay = self._hedge_delay()
+            if hedge_delay is not None and hedge_delay < timeout:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    self.hedges += 1
+                    UPSTREAM_HEDGES.labels(self.name).inc()
+                    tasks.add(asyncio.ensure_future(operation()))
+
+            error: Optional[BaseException] = None
+            while tasks:
+                done, _ = await asyncio.wait(tasks, timeout=end - loop.time(), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is None:
+                        self.latencies.add(loop.time() - start)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if task.done():
+                    if not task.cancelled():
+                        # Retrieve it so a losing request's error is not logged as unhandled
+                        task.exception()
+                else:
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "trips": self.breaker.trips,
+            "calls": self.calls,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "rejected": self.rejected,
+            "hedge_after": (
+                round(self.latencies.percentile(self.hedge_percentile), 4)
+                if self.hedge_percentile > 0 and len(self.latencies) >= self.hedge_min_samples else None
+            ),
+        }
@@ -1,5 +1,5 @@
 import re
-from typing import Optional
+from typing import List, Optional
 
 # Keep clean_text and validate_word functions as they are
 def clean_text(text: str) -> str:
@@ -34,6 +34,50 @@ def validate_word(word: str) -> Optional[str]:
     return cleaned_word if cleaned_word else None
 
 
+# Patterns used by preprocess_markdown(), compiled once
+
+# Standard Markdown links: [text](url)
+_MD_LINK = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+
+# Standalone URLs, including common malformations like missing // or starting with www:
+#    \b            - Word boundary, ensures we don't match mid-word
+#    (https?://? - Matches 'http://', 'https://', 'http', 'https' (optional //)
+#    |www\.       - OR matches 'www.' literally
+#    )             - End of group
+#    [^\s()<>]+    - Matches one or more characters that are NOT whitespace or common wrapping brackets
+#    (?:\([^\s()<>]*\)|[^\s`!()\[\]{};:'".,<>?«»“”‘’])* - Optionally matches balanced parentheses or trailing punctuation
+_URL = re.compile(r'\b(https?://?|www\.)[^\s()<>]+(?:\([^\s()<>]*\)|[^\s`!()\[\]{};:\'".,<>?«»“”‘’])*')
+
+# Runs of non-word, non-space characters, cleaned up by _clean_punct_run()
+_PUNCT_RUN = re.compile(r'[^\w\s]+')
+_WORD_CHAR = re.compile(r'\w')
+_DIGIT = re.compile(r'\d')
+
+
+def _clean_punct_run(match: re.Match) -> str:
+    """
+    Remove a run of 2+ special characters, or a single one not touching a word.
+
+    A percent sign right after a digit ("50%") is kept and counts as a word
+    character.
+    """
+    run = match.group()
+    start, end = match.span()
+    text = match.string
+    if run[0] == '%' and start and _DIGIT.match(text, start - 1):
+        # A single character after the percent sign touches it and is kept
+        return run if len(run) == 2 else '%'
+    if len(run) > 1:
+        return ''
+    if (start and _WORD_CHAR.match(text, start - 1)) or _WORD_CHAR.match(text, end):
+        return run
+    return ''
+
+
+# "percent" right after a digit reads as a percent sign
+_DIGIT_PERCENT = re.compile(r'(?<=\d)percent')
+
+
 def preprocess_markdown(text: str) -> str:
     """
     Preprocess markdown text:
@@ -52,44 +96,193 @@ def preprocess_markdown(text: str) -> str:
         return ""
 
     # 1. Remove standard Markdown links COMPLETELY: [text](url) -> (nothing)
-    text = re.sub(r'\[([^\]]*)\]\([^)]*\)', '', text)
-
-    # 2. Remove standalone URLs (including common malformations like missing // or starting with www)
-    #    Regex explanation:
-    #    \b            - Word boundary, ensures we don't match mid-word
-    #    (https?://? - Matches 'http://', 'https://', 'http', 'https' (optional //)
-    #    |www\.       - OR matches 'www.' literally
-    #    )             - End of group
-    #    [^\s()<>]+    - Matches one or more characters that are NOT whitespace or common wrapping brackets
-    #    (?:\([^\s()<>]*\)|[^\s`!()\[\]{};:'".,<>?«»“”‘’])* - Optionally matches balanced parentheses or trailing punctuation
-    #    This more complex regex attempts to handle URLs more robustly, including those followed by punctuation.
-    #    A simpler version could be: r'\b(https?://?|www\.)[^\s]+'
-    url_pattern = r'\b(https?://?|www\.)[^\s()<>]+(?:\([^\s()<>]*\)|[^\s`!()\[\]{};:\'".,<>?«»“”‘’])*'
-    text = re.sub(url_pattern, '', text)
-
-    # 3. Remove excess blank spaces (leading, trailing, and multiple spaces)
-    #    Run this *after* removals to clean up leftover spaces
-    text = re.sub(r'\s+', ' ', text).strip()
-
-    # 4. Handle specific cases / special character cleanup
-    #    Temporarily replace percentages
-    text = re.sub(r'(\d+)%', r'\1percent', text)
-
-    #    Remove 2+ consecutive non-alphanumeric characters (excluding space)
-    #    This helps clean up things like '))' left after URL removal
-    text = re.sub(r'[^\w\s]{2,}', '', text) # \w includes letters, numbers, underscore
-
-    #    Remove isolated single non-word, non-space characters
-    #    This helps clean up single punctuation like ')' if isolated by spaces
-    text = re.sub(r'(?<!\w)[^\w\s](?!\w)', '', text)
-
-    #    Restore percentages
-    text = re.sub(r'(\d+)percent', r'\1%', text)
-
-    #    Handle spaces between letters and numbers (Optional - often too aggressive)
-    #    text = re.sub(r'([a-zA-Z])\s+(\d+)', r'\1\2', text)
-
-    # 5. Final cleanup of spaces that might have been introduced or left over
-    text = re.sub(r'\s+', ' ', text).strip()
-
-    return text
\ No newline at end of file
+    if '](' in text:
+        text = _MD_LINK.sub('', text)
+
+    # 2. Remove standalone URLs
+    if 'http' in text or 'www.' in text:
+        text = _URL.sub('', text)
+
+    # 3. Remove 2+ consecutive non-alphanumeric characters (excluding space), e.g. '))'
+    #    left after URL removal, and isolated single ones, keeping percentages
+    text = _PUNCT_RUN.sub(_clean_punct_run, text)
+    if 'percent' in text:
+        text = _DIGIT_PERCENT.sub('%', text)
+
+    # 4. Remove excess blank spaces (leading, trailing, and multiple spaces)
+    return ' '.join(text.split())
+
+
+class MarkdownCleaner:
+    """
+    Incremental version of preprocess_markdown() for content fetched in chunks.
+
+    Text is fed as it arrives and cleaned up to the last whitespace that no
+    pattern can match across (i.e. outside any Markdown link that may still
+    be completed); the rest is kept until more text or finish() arrives.
+    Joining everything returned gives exactly ``preprocess_markdown(full_text)``.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._emitted = False
+
+    def _safe_cut(self) -> int:
+        """Get the end of the longest prefix of the buffer that can be cleaned on its own."""
+        buffer = self._buffer
+        limit = len(buffer)
+        spans = []
+        i = buffer.find('[')
+        while i != -1:
+            close = buffer.find(']', i + 1)
+            if close == -1 or close + 1 >= len(buffer):
+                limit = i
+                break
+            if buffer[close + 1] == '(':
+                end = buffer.find(')', close + 2)
+                if end == -1:
+                    limit = i
+                    break
+                spans.append((i, end))
+                i = buffer.find('[', end + 1)
+            else:
+                i = buffer.find('[', i + 1)
+
+        # Cut right after the last whitespace before the limit that is not inside a link
+        cut = limit
+        while cut > 0:
+            position = max(buffer.rfind(' ', 0, cut), buffer.rfind('\n', 0, cut))
+            if position == -1:
+                return 0
+            inside = next((start for start, end in spans if start < position < end), None)
+            if inside is None:
+                return position + 1
+            cut = inside
+        return 0
+
+    def _emit(self, segment: str) -> str:
+        cleaned = preprocess_markdown(segment)
+        if not cleaned:
+            return ""
+        if self._emitted:
+            cleaned = ' ' + cleaned
+        self._emitted = True
+        return cleaned
+
+    def feed(self, chunk: str) -> str:
+        """
+        Feed the next chunk of text.
+
+        Args:
+            chunk: Next piece of the markdown text
+
+        Returns:
+            Newly cleaned text (possibly empty), to be appended to the previous output
+        """
+        self._buffer += chunk
+        cut = self._safe_cut()
+        if cut == 0:
+            return ""
+        segment, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        return self._emit(segment)
+
+    def finish(self) -> str:
+        """Clean whatever text is still buffered."""
+        segment, self._buffer = self._buffer, ""
+        return self._emit(segment)
+
+
+_WORD = re.compile(r"[A-Za-z]+")
+
+
+def tokenize_words(text: str) -> List[str]:
+    """
+    Split text into alphabetic word tokens.
+
+    Args:
+        text: The text to tokenize
+
+    Returns:
+        List of words, in order, with their original case
+    """
+    return _WORD.findall(text)
+
+
+_SENTENCE_END = re.compile(r'(?:(?<=[.!?…])|(?<=[.!?…]["\'”’)\]]))\s+')
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences on terminal punctuation followed by whitespace.
+
+    Args:
+        text: The text to split
+
+    Returns:
+        List of non-empty sentences
+    """
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+
+
+def chunk_text(text: str, max_chars: int) -> List[str]:
+    """
+    Split text into chunks of at most max_chars characters on sentence boundaries.
+
+    Sentences longer than max_chars are split on whitespace.
+
+    Args:
+        text: The text to split
+        max_chars: Maximum length of a chunk
+
+    Returns:
+        List of chunks, in document order
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    current = ""
+    for sentence in split_sentences(text):
+        pieces = [sentence]
+        if len(sentence) > max_chars:
+            pieces = []
+            piece = ""
+            for word in sentence.split():
+                if piece and len(piece) + 1 + len(word) > max_chars:
+                    pieces.append(piece)
+                    piece = word
+                else:
+                    piece = f"{piece} {word}" if piece else word
+            if piece:
+                pieces.append(piece)
+
+        for piece in pieces:
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}" if current else piece
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def normalize_lemma(word: str) -> str:
+    """
+    Reduce a word to a rough lemma for deduplication (case and regular plurals).
+
+    Args:
+        word: The word to normalize
+
+    Returns:
+        Lowercase word with regular plural endings removed
+    """
+    word = word.strip().lower()
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("ses", "xes", "zes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
@@ -0,0 +1,42 @@
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    Tokens are refilled continuously at ``rate`` per second up to
+    ``capacity``; each admitted request takes one token.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def available(self) -> float:
+        """Get the number of tokens currently available."""
+        self._refill(time.monotonic())
+        return self.tokens
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available; return whether the request is admitted."""
+        self._refill(time.monotonic())
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def time_until_available(self, tokens: float = 1.0) -> float:
+        """Get the number of seconds until ``tokens`` tokens are available."""
+        self._refill(time.monotonic())
+        if self.tokens >= tokens:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (tokens - self.tokens) / self.rate
@@ -0,0 +1,88 @@
+import ipaddress
+import socket
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import DefaultResolver
+
+
+class UnsafeURLError(ValueError):
+    """Raised for URLs the server must not fetch on behalf of a client."""
+
+
+def is_public_address(address: str) -> bool:
+    """
+    Check whether an IP address is on the public internet.
+
+    Loopback, private (RFC 1918, unique local), link-local (including cloud
+    metadata endpoints), shared, reserved, multicast and unspecified
+    addresses are not. IPv4-mapped IPv6 addresses are judged by their IPv4
+    address.
+    """
+    try:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+    except ValueError:
+        return False
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not (
+        ip.is_multicast or ip.is_reserved or ip.is_loopback or ip.is_link_local or ip.is_unspecified
+    )
+
+
+def check_url(url: str, allow_private: bool = False) -> None:
+    """
+    Check that a URL may be fetched: http(s) with a host that is not a non-public IP literal.
+
+    Host names are checked when they are resolved (see PublicAddressResolver),
+    so an address that changes between the check and the connection is
+    still caught.
+
+    Raises:
+        UnsafeURLError: The URL must not be fetched
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise UnsafeURLError(f"Unsupported URL scheme: {parts.scheme or '(none)'}")
+    try:
+        host = parts.hostname
+    except ValueError:
+        host = None
+    if not host:
+        raise UnsafeURLError("URL has no host")
+    if allow_private:
+        return
+    try:
+        ipaddress.ip_address(host.split("%", 1)[0])
+    except ValueError:
+        return
+    if not is_public_address(host):
+        raise UnsafeURLError(f"URL points to a non-public address: {host}")
+
+
+class PublicAddressResolver(AbstractResolver):
+    """
+    aiohttp resolver that only returns public addresses.
+
+    Connections to a name resolving only to internal addresses fail with
+    ClientConnectorError, whether the name comes from the original URL or
+    from a redirect. aiohttp does not resolve IP literals, so those must be
+    checked with check_url() before each request.
+    """
+
+    def __init__(self):
+        self._resolver: Optional[AbstractResolver] = None
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> List[Dict[str, Any]]:
+        if self._resolver is None:
+            # The default resolver binds to the running loop on creation
+            self._resolver = DefaultResolver()
+        hosts = [info for info in await self._resolver.resolve(host, port, family) if is_public_address(info["host"])]
+        if not hosts:
+            raise OSError(f"{host} does not resolve to a public address")
+        return hosts
+
+    async def close(self) -> None:
+        if self._resolver is not None:
+            await self._resolver.close()
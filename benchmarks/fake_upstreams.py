@@ -0,0 +1,210 @@
+"""
+Local stand-ins for the third-party services the app calls.
+
+One aiohttp server answers, under separate path prefixes:
+
+- /dictionary/{word}: the dictionaryapi.dev entries API (404 for words
+  starting with "zz")
+- /gemini/v1beta/models/{model}:generateContent (and
+  :streamGenerateContent): canned vocabulary lists and quizzes built from
+  the words in the prompt
+- /pages/{n}: HTML articles with an ETag, answering conditional requests
+
+Each service has its own latency distribution (log-normal around a
+median) and error rate, drawn from a seeded generator so runs are
+reproducible.
+
+Usage:
+    python -m benchmarks.fake_upstreams [--port 8900] [--dictionary 30:0.5:0] [--gemini 800:0.4:0.01] [--pages 80:0.6:0]
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+_WORDS = (
+    "ephemeral ubiquitous serendipity meticulous resilient pragmatic tenacious benevolent "
+    "eloquent ambiguous candid diligent frugal lucid obscure plausible prudent reluctant "
+    "scrutiny tentative vigilant whimsical abundant coherent conspicuous deliberate elaborate "
+    "formidable inevitable intricate notorious perpetual profound reciprocal spontaneous"
+).split()
+
+_LONG_WORD = re.compile(r"\b[a-z]{7,}\b")
+
+
+@dataclass
+class Profile:
+    """Latency distribution and error rate of one stand-in service."""
+
+    median_ms: float
+    sigma: float = 0.5
+    error_rate: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Profile":
+        """Parse ``median_ms[:sigma[:error_rate]]``."""
+        parts = [float(part) for part in spec.split(":")]
+        return cls(*parts)
+
+
+class FakeUpstreams:
+    def __init__(self, profiles: Dict[str, Profile], seed: int = 0):
+        self.profiles = profiles
+        self.rng = random.Random(seed)
+        self.requests = {name: 0 for name in profiles}
+
+    async def _delay(self, name: str) -> bool:
+        """Wait for a simulated latency; returns whether the call should fail."""
+        profile = self.profiles[name]
+        self.requests[name] += 1
+        if profile.median_ms > 0:
+            delay = self.rng.lognormvariate(math.log(profile.median_ms / 1000), profile.sigma)
+            await asyncio.sleep(delay)
+        return self.rng.random() < profile.error_rate
+
+    async def dictionary(self, request: web.Request) -> web.Response:
+        word = request.match_info["word"].lower()
+        if await self._delay("dictionary"):
+            return web.json_response({"title": "Server Error"}, status=500)
+        if word.startswith("zz"):
+            return web.json_response({"title": "No Definitions Found"}, status=404)
+        return web.json_response([{
+            "word": word,
+            "phonetic": f"/{word}/",
+            "phonetics": [{"text": f"/{word}/", "audio": ""}],
+            "meanings": [{
+                "partOfSpeech": "noun",
+                "definitions": [
+                    {"definition": f"The first sense of {word}.", "example": f"A sentence with {word} in it."},
+                    {"definition": f"Another sense of {word}."}
+                ]
+            }]
+        }])
+
+    @staticmethod
+    def _answer(prompt: str) -> str:
+        """Build a plausible Gemini answer for a vocabulary or quiz prompt."""
+        if "Words and their information:" in prompt:
+            section = prompt.split("Words and their information:", 1)[1].split("Return a JSON array", 1)[0]
+            words = json.loads(section)
+            quiz = [
+                {
+                    "word": item["word"],
+                    "definition": item["definition"],
+                    "question": f"Which word means: \"{item['definition']}\"?",
+                    "options": [item["word"], "alpha", "bravo", "charlie"],
+                    "correct_option_idx": 0
+                }
+                for item in words
+            ]
+            return json.dumps(quiz)
+
+        if "Candidates: " in prompt:
+            section = prompt.split("Candidates: ", 1)[1].split("\nOutput:", 1)[0]
+            words = [candidate["word"] for candidate in json.loads(section)]
+        else:
+            section = prompt.split('Input text: "', 1)[-1].split('"\nOutput:', 1)[0]
+            words = _LONG_WORD.findall(section.lower())
+        words = list(dict.fromkeys(words))[:10]
+        vocabulary = [
+            {
+                "word": word,
+                "partOfSpeech": "noun",
+                "definition": f"The meaning of {word}.",
+                "example": f"This sentence uses {word}."
+            }
+            for word in words
+        ]
+        return "```json\n" + json.dumps(vocabulary) + "\n```"
+
+    @staticmethod
+    def _candidate(text: str) -> Dict[str, Any]:
+        return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}]}
+
+    async def gemini(self, request: web.Request) -> web.StreamResponse:
+        _, _, method = request.match_info["action"].partition(":")
+        body = await request.json()
+        prompt = "".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+        if await self._delay("gemini"):
+            return web.json_response(
+                {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}},
+                status=503
+            )
+
+        text = self._answer(prompt)
+        if method != "streamGenerateContent":
+            return web.json_response(self._candidate(text))
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        step = max(len(text) // 4, 1)
+        for i in range(0, len(text), step):
+            await response.write(f"data: {json.dumps(self._candidate(text[i:i + step]))}\r\n\r\n".encode())
+            await asyncio.sleep(0.01)
+        await response.write_eof()
+        return response
+
+    async def page(self, request: web.Request) -> web.Response:
+        number = int(request.match_info["number"])
+        etag = f'"page-{number}"'
+        if await self._delay("pages"):
+            return web.Response(status=503, text="Service Unavailable")
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(text=generate_article(number), content_type="text/html", headers={"ETag": etag})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/dictionary/{word}", self.dictionary)
+        app.router.add_post("/gemini/v1beta/models/{action}", self.gemini)
+        app.router.add_get("/pages/{number}", self.page)
+        app.router.add_get("/stats", lambda request: web.json_response(self.requests))
+        return app
+
+
+def generate_article(number: int, paragraphs: int = 12) -> str:
+    """Generate a deterministic HTML article with navigation and a sidebar."""
+    rng = random.Random(number)
+    body: List[str] = []
+    for _ in range(paragraphs):
+        sentence = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(30, 60)))
+        body.append(f"<p>{sentence.capitalize()}, and then some more words.</p>")
+    return (
+        f"<html><head><title>Article {number}</title>"
+        f'<meta name="description" content="Benchmark article {number}"></head><body>'
+        '<nav><a href="/">Home</a> <a href="/about">About</a></nav>'
+        f'<article class="post"><h1>Article {number}</h1>{"".join(body)}</article>'
+        '<aside class="sidebar"><ul><li><a href="/1">Related</a></li></ul></aside>'
+        "</body></html>"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the fake upstream services")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--dictionary", default="30:0.5:0", help="median_ms[:sigma[:error_rate]]")
+    parser.add_argument("--gemini", default="800:0.4:0", help="median_ms[:sigma[:error_rate]]")
+    parser.add_argument("--pages", default="80:0.6:0", help="median_ms[:sigma[:error_rate]]")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    upstreams = FakeUpstreams(
+        {
+            "dictionary": Profile.parse(args.dictionary),
+            "gemini": Profile.parse(args.gemini),
+            "pages": Profile.parse(args.pages),
+        },
+        seed=args.seed
+    )
+    web.run_app(upstreams.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Load test of the API against local stand-ins of its upstream services.
+
+Starts benchmarks.fake_upstreams and the app (uvicorn, one worker) as
+subprocesses, with a generated config that points the dictionary API,
+Gemini and the fetched pages at the stand-ins. Each endpoint is then
+driven by a closed-loop load generator (``--concurrency`` requests in
+flight) for ``--duration`` seconds after a warm-up, and the results are
+printed as JSON: throughput, latency percentiles, status codes and the
+event loop lag the app reported on /metrics during the run. Results of
+two commits can be compared by diffing their JSON.
+
+By default caches are disabled (and fresh=true is sent) so every request
+reaches the stand-ins; --cache measures the cached paths instead, over
+--keys distinct inputs.
+
+Usage:
+    python -m benchmarks.load_test [--endpoints lookup,vocab_text,web_fetch,quiz]
+        [--concurrency 16] [--duration 10] [--warmup 2] [--cache] [--output results.json]
+        [--dictionary 30:0.5:0] [--gemini 800:0.4:0] [--pages 80:0.6:0]
+"""
+import argparse
+import asyncio
+import configparser
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from benchmarks.fake_upstreams import generate_article
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (method, path, JSON body)
+Request = Tuple[str, str, Any]
+
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def write_config(directory: str, upstream: str, cache: bool) -> str:
+    """Write an app config pointing at the stand-ins, based on the repository's config.ini."""
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(os.path.join(ROOT, "config.ini"))
+    overrides = {
+        "dictionary_api": {"base_url": f"{upstream}/dictionary/{{word}}", "backend": "remote"},
+        "local_dictionary": {"path": os.path.join(directory, "dictionary.sqlite3")},
+        "lookup_cache": {"enabled": str(cache).lower(), "disk_path": os.path.join(directory, "lookup.sqlite3")},
+        "llm_cache": {"enabled": str(cache).lower(), "disk_path": os.path.join(directory, "llm.sqlite3")},
+        "web_fetcher": {
+            "backend": "local",
+            "fetchfox_fallback": "false",
+            # The page stand-in listens on loopback
+            "allow_private_addresses": "true",
+            "cache_enabled": str(cache).lower(),
+            "cache_disk_path": os.path.join(directory, "web.sqlite3"),
+        },
+        "quiz": {"engine": "llm"},
+        "question_bank": {"enabled": str(cache).lower(), "path": os.path.join(directory, "questions.sqlite3")},
+        "ai": {"base_url": f"{upstream}/gemini", "requests_per_minute": "1000000"},
+        "metrics": {"enabled": "true"},
+        "security": {"rate_limit_enabled": "false"},
+        "logging": {"level": "WARNING", "file": os.path.join(directory, "app.log")},
+    }
+    for section, values in overrides.items():
+        if not config.has_section(section):
+            config.add_section(section)
+        for key, value in values.items():
+            config.set(section, key, value)
+
+    path = os.path.join(directory, "config.ini")
+    with open(path, "w") as f:
+        config.write(f)
+    return path
+
+
+def load_words() -> List[str]:
+    """Mid-frequency words (ranks 2000-20000), which the vocabulary pre-filter keeps."""
+    path = os.path.join(ROOT, "data", "word_frequency.txt")
+    with open(path, encoding="utf-8") as f:
+        words = [line.split()[0] for line in f if line.strip() and not line.startswith("#")]
+    return [word for word in words[2000:20000] if word.isalpha()]
+
+
+def workloads(upstream: str, cache: bool, keys: int) -> Dict[str, Callable[[random.Random], Request]]:
+    """Request generators per endpoint."""
+    words = load_words()
+    query = "" if cache else "?fresh=true"
+
+    def key(rng: random.Random) -> int:
+        return rng.randrange(keys) if cache else rng.randrange(1 << 30)
+
+    def lookup(rng: random.Random) -> Request:
+        word = words[key(rng) % len(words)]
+        return "GET", f"/lookup/{word}", None
+
+    def vocab_text(rng: random.Random) -> Request:
+        text = " ".join(_TAGS.sub(" ", generate_article(key(rng), paragraphs=4)).split())
+        return "POST", f"/vocab/extract_text{query}", text
+
+    def web_fetch(rng: random.Random) -> Request:
+        return "POST", f"/web/fetch{query}", {"url": f"{upstream}/pages/{key(rng)}"}
+
+    def quiz(rng: random.Random) -> Request:
+        sample = random.Random(key(rng)).sample(words, 10)
+        word_list = [
+            {"word": word, "definition": f"The meaning of {word}.", "example": f"This sentence uses {word}."}
+            for word in sample
+        ]
+        return "POST", f"/practice/quiz{query}", word_list
+
+    return {"lookup": lookup, "vocab_text": vocab_text, "web_fetch": web_fetch, "quiz": quiz}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(q * len(values) + 0.5)) - 1))]
+
+
+def parse_histogram(metrics: str, name: str) -> Dict[str, float]:
+    """Read the cumulative bucket counts (by upper bound) of an unlabelled histogram."""
+    buckets = {}
+    for match in re.finditer(rf'^{name}_bucket{{le="([^"]+)"}} (\S+)$', metrics, re.M):
+        buckets[match.group(1)] = float(match.group(2))
+    for suffix in ("sum", "count"):
+        match = re.search(rf"^{name}_{suffix} (\S+)$", metrics, re.M)
+        buckets[suffix] = float(match.group(1)) if match else 0.0
+    return buckets
+
+
+def histogram_summary(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, Any]:
+    """Summarize the observations made between two scrapes of a histogram."""
+    count = after["count"] - before.get("count", 0.0)
+    total = after["sum"] - before.get("sum", 0.0)
+    bounds = sorted(
+        (bound for bound in after if bound not in ("sum", "count")),
+        key=lambda bound: float("inf") if bound == "+Inf" else float(bound)
+    )
+    summary: Dict[str, Any] = {"samples": int(count), "mean_ms": round(total / count * 1000, 3) if count else 0.0}
+    for name, q in (("p50_le_ms", 0.5), ("p99_le_ms", 0.99)):
+        summary[name] = None
+        for bound in bounds:
+            if count and after[bound] - before.get(bound, 0.0) >= q * count:
+                summary[name] = None if bound == "+Inf" else float(bound) * 1000
+                break
+    return summary
+
+
+async def scrape(session: aiohttp.ClientSession, base: str) -> Dict[str, float]:
+    async with session.get(f"{base}/metrics") as response:
+        return parse_histogram(await response.text(), "event_loop_lag_seconds")
+
+
+async def run_phase(
+    session: aiohttp.ClientSession,
+    base: str,
+    make_request: Callable[[random.Random], Request],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    seed: int
+) -> Dict[str, Any]:
+    """Drive one endpoint with a closed-loop load and summarize the measured window."""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    measuring = False
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + warmup + duration
+
+    async def worker(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        while loop.time() < stop_at:
+            method, path, body = make_request(rng)
+            start = time.perf_counter()
+            try:
+                async with session.request(method, f"{base}{path}", json=body) as response:
+                    await response.read()
+                    status = str(response.status)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = type(e).__name__
+            if measuring:
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    workers = [asyncio.create_task(worker(i)) for i in range(concurrency)]
+    await asyncio.sleep(warmup)
+    lag_before = await scrape(session, base)
+    measuring = True
+    started = time.perf_counter()
+    await asyncio.gather(*workers)
+    elapsed = time.perf_counter() - started
+    lag_after = await scrape(session, base)
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            name: round(percentile(latencies, q) * 1000, 2)
+            for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+        },
+        "statuses": statuses,
+        "event_loop_lag": histogram_summary(lag_before, lag_after),
+    }
+
+
+async def wait_until_ready(session: aiohttp.ClientSession, url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode}")
+        try:
+            async with session.get(url) as response:
+                if response.status < 500:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not start within {timeout}s")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    upstream_port, app_port = free_port(), free_port()
+    upstream = f"http://127.0.0.1:{upstream_port}"
+    base = f"http://127.0.0.1:{app_port}"
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as directory:
+        env = {
+            **os.environ,
+            "CONFIG_PATH": write_config(directory, upstream, args.cache),
+            "GEMINI_MODEL_API_KEY": "benchmark-key",
+        }
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.fake_upstreams", "--port", str(upstream_port),
+                 "--dictionary", args.dictionary, "--gemini", args.gemini, "--pages", args.pages,
+                 "--seed", str(args.seed)],
+                cwd=ROOT, env=env
+            ),
+            subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+                 "--port", str(app_port), "--log-level", "warning", "--no-access-log"],
+                cwd=ROOT, env=env
+            ),
+        ]
+        try:
+            connector = aiohttp.TCPConnector(limit=0)
+            timeout = aiohttp.ClientTimeout(total=args.request_timeout)
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                await wait_until_ready(session, f"{upstream}/stats", processes[0], 30)
+                await wait_until_ready(session, f"{base}/", processes[1], 60)
+
+                generators = workloads(upstream, args.cache, args.keys)
+                results = {}
+                for endpoint in args.endpoints.split(","):
+                    results[endpoint] = await run_phase(
+                        session, base, generators[endpoint], args.concurrency, args.duration, args.warmup, args.seed
+                    )
+                    print(f"{endpoint}: {results[endpoint]['throughput_rps']} req/s, "
+                          f"p99 {results[endpoint]['latency_ms']['p99']} ms", file=sys.stderr)
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait(timeout=10)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "endpoints": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API against local upstream stand-ins")
+    parser.add_argument("--endpoints", default="lookup,vocab_text,web_fetch,quiz")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight")
+    parser.add_argument("--duration", type=float, default=10, help="Measured seconds per endpoint")
+    parser.add_argument("--warmup", type=float, default=2, help="Unmeasured seconds before each measurement")
+    parser.add_argument("--request-timeout", type=float, default=60)
+    parser.add_argument("--cache", action="store_true", help="Enable the caches and reuse --keys inputs")
+    parser.add_argument("--keys", type=int, default=100, help="Distinct inputs per endpoint with --cache")
+    parser.add_argument("--dictionary", default="30:0.5:0", help="Dictionary API median_ms[:sigma[:error_rate]]")
+    parser.add_argument("--gemini", default="800:0.4:0", help="Gemini median_ms[:sigma[:error_rate]]")
+    parser.add_argument("--pages", default="80:0.6:0", help="Page server median_ms[:sigma[:error_rate]]")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Micro-benchmark of markdown preprocessing on large scraped pages.
+
+Compares the previous eight-pass implementation of preprocess_markdown()
+with the current one and with the streaming MarkdownCleaner, and checks
+that all three produce identical output (including on randomly generated
+text).
+
+Usage:
+    python -m benchmarks.markdown_preprocess [--size-kb 2048] [--repeat 5] [--fuzz 2000]
+"""
+import argparse
+import random
+import re
+import time
+
+from app.utils.text_utils import MarkdownCleaner, preprocess_markdown
+
+
+def legacy_preprocess_markdown(text: str) -> str:
+    """The original implementation, kept as the reference for equivalence."""
+    if not isinstance(text, str):
+        return ""
+    text = re.sub(r'\[([^\]]*)\]\([^)]*\)', '', text)
+    url_pattern = r'\b(https?://?|www\.)[^\s()<>]+(?:\([^\s()<>]*\)|[^\s`!()\[\]{};:\'".,<>?«»“”‘’])*'
+    text = re.sub(url_pattern, '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = re.sub(r'(\d+)%', r'\1percent', text)
+    text = re.sub(r'[^\w\s]{2,}', '', text)
+    text = re.sub(r'(?<!\w)[^\w\s](?!\w)', '', text)
+    text = re.sub(r'(\d+)percent', r'\1%', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def streaming_preprocess_markdown(text: str, chunk_size: int) -> str:
+    cleaner = MarkdownCleaner()
+    parts = [cleaner.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+    parts.append(cleaner.finish())
+    return "".join(parts)
+
+
+_WORDS = (
+    "the vocabulary of a language grows as speakers borrow words from other languages "
+    "ephemeral ubiquitous serendipity 2024 50% growth café naïve résumé"
+).split()
+
+_DECORATIONS = [
+    "[{w}](https://example.com/{w})", "https://www.example.org/path/{w}?q=1", "www.{w}.com",
+    "**{w}**", "_{w}_", "`{w}`", "# {w}", "- {w}", "({w})", "{w}!!", "{w}...", "{w},", "{w}.",
+    "![img](/static/{w}.png)", "| {w} |", "> {w}", "{w} %", "{w}%", "5%{w}", "[{w}]",
+]
+
+
+def generate_page(size: int, rng: random.Random) -> str:
+    """Generate markdown resembling a scraped article of roughly ``size`` characters."""
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        if rng.random() < 0.25:
+            word = rng.choice(_DECORATIONS).format(w=word)
+        separator = "\n\n" if rng.random() < 0.03 else ("\n" if rng.random() < 0.05 else " ")
+        parts.append(word + separator)
+        length += len(word) + len(separator)
+    return "".join(parts)
+
+
+_FUZZ_ALPHABET = list("ab1 5%.,!?()[]<>-_*#\n\t \x1céhttpwww:/") + ["http", "https://", "www.", "](", "percent"]
+
+
+def fuzz(iterations: int, rng: random.Random) -> int:
+    """Compare the implementations on random text; returns the number of mismatches."""
+    mismatches = 0
+    for _ in range(iterations):
+        text = "".join(rng.choice(_FUZZ_ALPHABET) for _ in range(rng.randint(0, 80)))
+        expected = legacy_preprocess_markdown(text)
+        results = [preprocess_markdown(text)] + [
+            streaming_preprocess_markdown(text, chunk_size) for chunk_size in (1, 3, 7)
+        ]
+        if any(result != expected for result in results):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"mismatch on {text!r}: expected {expected!r}, got {results!r}")
+    return mismatches
+
+
+def timeit(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark markdown preprocessing")
+    parser.add_argument("--size-kb", type=int, default=2048, help="Size of the generated page")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per implementation (best is reported)")
+    parser.add_argument("--chunk-size", type=int, default=16384, help="Chunk size of the streaming run")
+    parser.add_argument("--fuzz", type=int, default=2000, help="Random texts to compare")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    page = generate_page(args.size_kb * 1024, rng)
+
+    expected = legacy_preprocess_markdown(page)
+    assert preprocess_markdown(page) == expected, "preprocess_markdown output differs"
+    assert streaming_preprocess_markdown(page, args.chunk_size) == expected, "MarkdownCleaner output differs"
+
+    print(f"page: {len(page) / 1024:.0f} KB")
+    legacy = timeit(lambda: legacy_preprocess_markdown(page), args.repeat)
+    for name, func in (
+        ("legacy", lambda: legacy_preprocess_markdown(page)),
+        ("preprocess_markdown", lambda: preprocess_markdown(page)),
+        (f"MarkdownCleaner ({args.chunk_size} B chunks)", lambda: streaming_preprocess_markdown(page, args.chunk_size)),
+    ):
+        seconds = legacy if name == "legacy" else timeit(func, args.repeat)
+        print(f"{name:<40} {seconds * 1000:8.1f} ms  {len(page) / seconds / 2 ** 20:6.1f} MB/s  x{legacy / seconds:.2f}")
+
+    mismatches = fuzz(args.fuzz, rng)
+    print(f"fuzz: {args.fuzz} texts, {mismatches} mismatches")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
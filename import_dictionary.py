@@ -0,0 +1,21 @@
+import argparse
+import time
+
+from app.config import settings
+from app.services.local_dictionary import build_index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Import a bulk dictionary dump (JSON lines) into the local dictionary index."
+    )
+    parser.add_argument("dump", help="Path of the dump file (.jsonl or .jsonl.gz)")
+    parser.add_argument(
+        "--output",
+        default=settings.local_dictionary_path,
+        help="Path of the index to create (default: [local_dictionary] path from config.ini)"
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    count = build_index(args.dump, args.output)
+    print(f"Imported {count} entries into {args.output} in {time.perf_counter() - started:.1f}s")